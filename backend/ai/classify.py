@@ -1,6 +1,153 @@
-def classify_secret(metadata: dict) -> dict:
+import json
+import os
+import re
+from fnmatch import translate
+from backend.normalize.domains import parse_domain
+
+RULES_FILE = os.path.join(os.path.dirname(__file__), "rules.json")
+
+UNKNOWN = ("unknown", "Unknown")
+
+
+class RuleClassifier:
     """
-    Use heuristics (mocking LLM) to decide credential type:
+    Decides a credential's type and service from declarative rules.
+
+    Types: password, api_key, session_cookie, ssh_key, db_connection,
+    unknown. Each rule names a type and service and one kind of evidence:
+
+    - prefixes: literal starts of the secret value (ghp_, AKIA, sk-ant-)
+    - format: a regex the secret value starts with (PEM headers, DB URLs)
+    - pattern_names: the collector pattern that found the secret
+    - files: names or globs of the file it was found in, optionally only
+      under one of dirs (.aws/credentials)
+    - domains: sites or hosts of the origin; "*" takes the service from
+      the domain index (normalize/domains.py)
+
+    Rules are compiled once into a prefix trie (longest prefix wins), one
+    alternation regex per kind of pattern, and hash lookups for the rest,
+    so classifying a finding is a handful of dict lookups and at most two
+    regex matches. Evidence is tried in the order above; within a kind,
+    the first rule in the file wins.
+    """
+
+    def __init__(self, rules: list):
+        self.trie = {}
+        self.pattern_names = {}
+        self.file_names = {}
+        self.domains = {}
+        formats, self.format_results = [], []
+        globs, self.glob_results = [], []
+        for rule in rules:
+            result = (rule["type"], rule.get("service") or UNKNOWN[1])
+            for prefix in rule.get("prefixes", ()):
+                node = self.trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                # None can't collide with a character key
+                node.setdefault(None, result)
+            if "format" in rule:
+                formats.append(f"(?P<r{len(formats)}>{rule['format']})")
+                self.format_results.append(result)
+            for name in rule.get("pattern_names", ()):
+                self.pattern_names.setdefault(name, result)
+            dirs = frozenset(rule.get("dirs", ()))
+            for name in rule.get("files", ()):
+                if any(c in name for c in "*?["):
+                    globs.append(f"(?P<g{len(globs)}>{translate(name)})")
+                    self.glob_results.append((result, dirs))
+                else:
+                    self.file_names.setdefault(name, []).append((result, dirs))
+            for domain in rule.get("domains", ()):
+                self.domains.setdefault(domain.lower(), result)
+        self.formats = re.compile("|".join(formats)) if formats else None
+        self.globs = re.compile("|".join(globs)) if globs else None
+
+    def match_prefix(self, secret_value: str):
+        """Result of the longest rule prefix the secret starts with, or None."""
+        node, found = self.trie, None
+        for char in secret_value:
+            node = node.get(char)
+            if node is None:
+                break
+            found = node.get(None, found)
+        return found
+
+    def match_file(self, path: str):
+        """Result of the first file rule matching the path's name (and parent directory)."""
+        parts = path.replace("\\", "/").rsplit("/", 2)
+        name = parts[-1]
+        parent = parts[-2] if len(parts) > 1 else ""
+        for result, dirs in self.file_names.get(name, ()):
+            if not dirs or parent in dirs:
+                return result
+        if self.globs is not None:
+            match = self.globs.match(name)
+            if match:
+                result, dirs = self.glob_results[int(match.lastgroup[1:])]
+                if not dirs or parent in dirs:
+                    return result
+        return None
+
+    def match_domain(self, origin: str):
+        """Result of the domain rule for the origin's host or site, or None."""
+        info = parse_domain(origin)
+        if not info.host:
+            return None
+        result = self.domains.get(info.host) or self.domains.get(info.site)
+        if result is None and "*" in self.domains:
+            rule_type = self.domains["*"][0]
+            result = (rule_type, info.service or UNKNOWN[1])
+        return result
+
+    def classify(self, secret_value: str = None, pattern_name: str = None, path: str = None, origin: str = None) -> tuple:
+        """(type, service) for one credential; UNKNOWN when no rule matches."""
+        if secret_value:
+            result = self.match_prefix(secret_value)
+            if result is None and self.formats is not None:
+                match = self.formats.match(secret_value)
+                if match:
+                    result = self.format_results[int(match.lastgroup[1:])]
+            if result is not None:
+                return result
+        if pattern_name:
+            result = self.pattern_names.get(pattern_name)
+            if result is not None:
+                return result
+        if path:
+            result = self.match_file(path)
+            if result is not None:
+                return result
+        if origin:
+            result = self.match_domain(origin)
+            if result is not None:
+                return result
+        return UNKNOWN
+
+    def classify_findings(self, findings: list) -> None:
+        """Set ai_type and ai_service_guess on every finding of a batch."""
+        classify = self.classify
+        for f in findings:
+            metadata = f.metadata
+            path = f.location.get("path") if f.source_type != "browser_password" else None
+            f.ai_type, f.ai_service_guess = classify(
+                f._secret_value, metadata.get("pattern_name"), path, metadata.get("origin") or f.domain
+            )
+
+
+def load_classifier(path: str = RULES_FILE) -> RuleClassifier:
+    """Compile the rules file into a RuleClassifier."""
+    with open(path, encoding="utf-8") as f:
+        return RuleClassifier(json.load(f)["rules"])
+
+
+# Compiled once, at import
+CLASSIFIER = load_classifier()
+
+
+def classify_secret(metadata: dict, secret_value: str = None, path: str = None) -> dict:
+    """
+    Decide credential type and service for one finding's metadata:
     - password
     - api_key
     - session_cookie
@@ -8,20 +155,7 @@ def classify_secret(metadata: dict) -> dict:
     - db_connection
     - unknown
     """
-    pattern_name = metadata.get("pattern_name", "")
-    origin = metadata.get("origin", "")
-    
-    if "AWS" in pattern_name:
-        return {"type": "api_key", "service_guess": "AWS"}
-    if "Slack" in pattern_name:
-        return {"type": "api_key", "service_guess": "Slack"}
-    if "Private Key" in pattern_name:
-        return {"type": "ssh_key", "service_guess": "SSH"}
-        
-    if origin:
-        if "github.com" in origin:
-            return {"type": "password", "service_guess": "GitHub"}
-        if "google.com" in origin:
-            return {"type": "password", "service_guess": "Google"}
-            
-    return {"type": "unknown", "service_guess": "Unknown"}
+    rule_type, service = CLASSIFIER.classify(
+        secret_value, metadata.get("pattern_name"), path, metadata.get("origin")
+    )
+    return {"type": rule_type, "service_guess": service}
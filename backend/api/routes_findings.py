@@ -0,0 +1,79 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(after) -> Optional[str]:
+    """Opaque page cursor for a (risk_score, id) keyset position."""
+    if after is None:
+        return None
+    return base64.urlsafe_b64encode(f"{after[0]}:{after[1]}".encode()).decode()
+
+def decode_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        risk_score, finding_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(risk_score), int(finding_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _split(value: Optional[str]) -> Optional[list]:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else None
+
+def register_findings_routes(app, db):
+    @app.get("/findings")
+    def list_findings(
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        min_risk: Optional[int] = None,
+        source_type: Optional[str] = None,
+        domain: Optional[str] = None,
+        variant_cluster: Optional[str] = None,
+        flags: Optional[str] = None,
+        fields: Optional[str] = None,
+        format: str = "json"
+    ):
+        """
+        Return findings, highest risk first, without the encrypted fields.
+        
+        flags and fields are comma-separated. format=json returns one page and
+        a next_cursor to pass back; format=ndjson streams every matching
+        finding, one JSON object per line, in constant memory.
+        """
+        filters = {
+            "min_risk": min_risk,
+            "source_type": source_type,
+            "domain": domain,
+            "variant_cluster": variant_cluster,
+            "flags": _split(flags),
+            "fields": _split(fields)
+        }
+        after = decode_cursor(cursor)
+        
+        try:
+            # Validates the filters before a streaming response is committed to
+            page = db.query_findings(after=after, limit=max(1, min(limit, MAX_PAGE_SIZE)), **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+            
+        if format == "ndjson":
+            def stream():
+                yield from (json.dumps(item) + "\n" for item in page["items"])
+                if page["next_after"] is not None:
+                    for item in db.iter_findings(after=page["next_after"], batch_size=MAX_PAGE_SIZE, **filters):
+                        yield json.dumps(item) + "\n"
+            return StreamingResponse(stream(), media_type="application/x-ndjson")
+            
+        return {"items": page["items"], "next_cursor": encode_cursor(page["next_after"])}
+
+    @app.get("/findings/{finding_id}")
+    def get_finding(finding_id: int):
+        """Return one finding with its encrypted fields decrypted."""
+        finding = db.get_finding(finding_id)
+        if finding is None:
+            raise HTTPException(status_code=404, detail="Finding not found")
+        return finding
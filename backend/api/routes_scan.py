@@ -1,10 +1,82 @@
+import json
+import time
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from backend.core.jobs import ScanJobManager, ScanInProgress
+
+EVENT_INTERVAL = 0.5  # seconds between SSE progress events
+
 def register_scan_routes(app, service):
-    @app.post("/scan/start")
+    jobs = ScanJobManager(service)
+    app.state.scan_jobs = jobs
+
+    def get_job_or_404(job_id: str):
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Scan job not found")
+        return job
+
+    @app.post("/scan/start", status_code=202)
     def start_scan():
-        # In a real app, run in background task
-        return service.run_full_scan()
+        """Start a scan in the background and return its job id."""
+        try:
+            job = jobs.start()
+        except ScanInProgress as e:
+            return JSONResponse(status_code=409, content={"detail": str(e), "job_id": e.job.id})
+        return {"job_id": job.id, "status": job.status}
 
     @app.get("/scan/latest")
     def get_latest_scan():
-        # TODO: Implement getting latest scan from DB
-        return {"status": "unknown"}
+        job = jobs.latest()
+        if job is not None:
+            return job.to_dict()
+        # Nothing ran since the server started: fall back to the scan log
+        scans = service.db.get_scans(limit=1)
+        if not scans:
+            return {"status": "unknown"}
+        return service.db.get_scan(scans[0]["id"])
+
+    @app.get("/scan/{job_id}")
+    def get_scan(job_id: str):
+        return get_job_or_404(job_id).to_dict()
+
+    @app.get("/scan/{job_id}/events")
+    def stream_scan(job_id: str):
+        """Server-sent events with the job's progress until it finishes."""
+        job = get_job_or_404(job_id)
+
+        def events():
+            while True:
+                done = job.done
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+                if done:
+                    return
+                time.sleep(EVENT_INTERVAL)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/scan/{job_id}/cancel")
+    def cancel_scan(job_id: str):
+        get_job_or_404(job_id)
+        return jobs.cancel(job_id).to_dict()
+
+    @app.get("/scans")
+    def list_scans(limit: int = 20):
+        """Logged scans, most recent first."""
+        return service.db.get_scans(limit=limit)
+
+    @app.get("/scans/compare")
+    def compare_scans(base: int, other: int):
+        """Per-phase wall/CPU/item deltas between two logged scans."""
+        comparison = service.db.compare_scans(base, other)
+        if comparison is None:
+            raise HTTPException(status_code=404, detail="Scan not found")
+        return comparison
+
+    @app.get("/scans/{scan_id}")
+    def get_logged_scan(scan_id: int):
+        """One logged scan with its per-phase timings."""
+        scan = service.db.get_scan(scan_id)
+        if scan is None:
+            raise HTTPException(status_code=404, detail="Scan not found")
+        return scan
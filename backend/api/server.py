@@ -4,6 +4,7 @@ from backend.storage.db import Database
 from backend.core.config import Config
 from backend.core.service import ScanService
 from backend.api.routes_scan import register_scan_routes
+from backend.api.routes_findings import register_findings_routes
 from backend.utils.paths import get_app_data_dir
 
 app = FastAPI()
@@ -17,16 +18,17 @@ service = ScanService(db, config)
 
 # Register Routes
 register_scan_routes(app, service)
+register_findings_routes(app, db)
 
 @app.on_event("startup")
 def startup_event():
     db.init()
+    # Weights edited in config.json apply to stored findings right away
+    try:
+        service.rescore_all_findings()
+    except Exception as e:
+        print(f"Could not rescore findings: {e}")
 
 @app.get("/status")
 def status():
     return {"ok": True, "db": db_path}
-
-@app.get("/findings")
-def list_findings():
-    """Return current findings."""
-    return db.get_all_findings()
@@ -5,6 +5,7 @@ import json
 import base64
 import tempfile
 from datetime import datetime
+from backend.normalize.domains import parse_domain
 try:
     import win32crypt
 except ImportError:
@@ -110,26 +111,30 @@ def extract_chrome_passwords(profile_path: str) -> list:
         
     return findings
 
-def run_browser_collectors() -> list:
-    """Collects credentials from all installed browsers."""
-    all_findings = []
-    profiles = find_chrome_profiles()
-    
-    for profile in profiles:
+def iter_browser_collectors():
+    """Collects credentials from all installed browsers, yielding one profile's findings at a time."""
+    for profile in find_chrome_profiles():
+        findings = []
         creds = extract_chrome_passwords(profile["path"])
         for cred in creds:
             # Convert to raw finding format
-            all_findings.append({
+            findings.append({
                 "source_type": "browser_password",
                 "location": {
                     "browser": profile["browser"],
                     "profile": profile["profile_name"],
-                    "path": profile["path"]
+                    "path": profile["path"],
+                    # One row per site: the same password saved for two
+                    # sites is reuse, for two pages of one site it is not
+                    "site": parse_domain(cred["domain"]).site
                 },
                 "secret_value": cred["password"],
                 "username": cred["username"],
                 "domain": cred["domain"],
                 "metadata": cred["metadata"]
             })
-            
-    return all_findings
+        yield findings
+
+def run_browser_collectors() -> list:
+    """Collects credentials from all installed browsers."""
+    return [finding for findings in iter_browser_collectors() for finding in findings]
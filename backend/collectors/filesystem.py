@@ -1,104 +1,371 @@
 import os
 import re
+import json
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from backend.utils.filetypes import is_text_file
+from backend.utils.walker import IGNORE_DIRS, walk_files
+from backend.collectors.matcher import SecretMatcher, LineIndex
 
 # Common patterns
 PATTERNS = [
     {
         "name": "AWS Access Key",
-        "regex": re.compile(r"(AKIA|ASIA)[0-9A-Z]{16}"),
+        "regex": re.compile(r"(?:AKIA|ASIA)[0-9A-Z]{16}"),
+        "keywords": ["AKIA", "ASIA"],
         "score": 10
     },
     {
         "name": "Private Key",
         "regex": re.compile(r"-----BEGIN (RSA|DSA|EC|OPENSSH|PRIVATE) KEY-----"),
+        "keywords": ["-----BEGIN "],
         "score": 10
     },
     {
         "name": "Generic Secret",
         "regex": re.compile(r"(api_key|apikey|secret|token|password)[\s]*[=:]+[\s]*['\"]?([a-zA-Z0-9\-_]{16,})['\"]?", re.IGNORECASE),
+        "keywords": ["api_key", "apikey", "secret", "token", "password"],
         "score": 5
     },
     {
         "name": "Slack Token",
-        "regex": re.compile(r"xox[baprs]-([0-9a-zA-Z]{10,48})"),
+        "regex": re.compile(r"xox[baprs]-[0-9a-zA-Z]{10,48}"),
+        "keywords": ["xox"],
         "score": 10
     }
 ]
 
-MAX_FILE_SIZE = 1024 * 1024 * 5  # 5MB
+# "keywords" are literal prefixes every match of the pattern starts with;
+# the matcher only tries a pattern where one of them occurs. The secret
+# value is the last capture group, or the whole match if there is none:
+# groups that only spell out alternatives must be non-capturing.
+MATCHER = SecretMatcher(PATTERNS)
 
-def scan_directory(path: str) -> list:
+def pattern_set_version(patterns: list = PATTERNS) -> str:
+    """Fingerprint of everything in the patterns that affects findings; keys the result cache."""
+    spec = [
+        [p["name"], p["regex"].pattern, p["regex"].flags, p["score"], p.get("keywords")]
+        for p in patterns
+    ]
+    return hashlib.sha256(json.dumps(spec).encode("utf-8")).hexdigest()[:16]
+
+# Files are read in bounded windows (see match_stream), so large logs and
+# .env dumps no longer cost their size in memory
+MAX_FILE_SIZE = 1024 * 1024 * 512  # 512MB
+WINDOW_SIZE = 1024 * 1024 * 4  # 4MB
+WINDOW_OVERLAP = 1024 * 64  # Longest match expected to straddle a window boundary
+
+DEFAULT_CHUNK_SIZE = 64
+
+def iter_files(path: str):
+    """Yield every file path under path, pruning ignored directories."""
+    for file_path, _ in walk_files(path):
+        yield file_path
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Keys (see digest_key) of the digests the result cache holds, as of the
+# start of the scan. Pool workers get a copy through the pool initializer.
+_known_digests = frozenset()
+
+def digest_key(digest: str) -> int:
+    """Compact stand-in for a digest in membership tests; the cache checks the full digest."""
+    return int(digest[:16], 16)
+
+def _init_worker(known_digests):
+    global _known_digests
+    _known_digests = known_digests
+
+def scan_file(file_path: str, previous_digest: str = None, track: bool = False, known=()) -> dict:
+    """
+    Apply the size/type filters, then detect secrets in one file.
+    
+    Returns a record with the file's stat fields and its findings, or None if
+    the file vanished. With track=True the content digest is included, and if
+    it equals previous_digest the findings are left as None: the content is
+    unchanged and the caller's earlier findings still apply.
+    
+    known holds digest keys the result cache has findings for. A file whose
+    digest is among them isn't matched either: its findings are left as None
+    and record["cached"] is set, for the caller to fetch from the cache.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+        
+    record = {
+        "path": file_path,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "inode": st.st_ino,
+        "digest": None,
+        "findings": []
+    }
+    
+    # Skip if too large
+    if st.st_size > MAX_FILE_SIZE:
+        return record
+        
+    # Skip if not text (simple check)
+    if not is_text_file(file_path):
+        return record
+        
+    if track or known:
+        try:
+            record["digest"] = file_digest(file_path)
+        except OSError:
+            return None
+        if previous_digest and record["digest"] == previous_digest:
+            record["findings"] = None
+            return record
+        if digest_key(record["digest"]) in known:
+            record["findings"] = None
+            record["cached"] = True
+            return record
+            
+    record["findings"] = detect_secrets_in_file(file_path)
+    return record
+
+def scan_files(items: list, track: bool = False, known=None) -> list:
+    """Scan a chunk of (path, previous_digest) items; the unit of work handed to pool workers."""
+    known = _known_digests if known is None else known
+    return [scan_file(file_path, previous_digest, track, known) for file_path, previous_digest in items]
+
+def rebase_findings(findings: list, path: str) -> list:
+    """Copy file findings onto another path with the same content."""
+    rebased = []
+    for finding in findings:
+        location = {"path": path}
+        location.update((k, v) for k, v in finding["location"].items() if k != "path")
+        rebased.append(dict(finding, location=location, metadata=dict(finding["metadata"])))
+    return rebased
+
+def _chunked(iterable, size: int):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _plan_chunk(chunk: list, manifest) -> tuple:
+    """Split a chunk of (path, DirEntry) pairs into manifest hits and work items for the scanners."""
+    paths = []
+    reused = {}
+    work = []
+    for file_path, entry in chunk:
+        paths.append(file_path)
+        if manifest is None:
+            work.append((file_path, None))
+            continue
+        findings, previous_digest = manifest.check(file_path, entry)
+        if findings is not None:
+            reused[file_path] = findings
+        else:
+            work.append((file_path, previous_digest))
+    return paths, reused, work
+
+def _resolve_cached(record: dict, cache, track: bool) -> dict:
+    """Fill in findings from the result cache, or store fresh ones in it."""
+    if record.pop("cached", False):
+        findings = cache.get(record["digest"], record["path"])
+        if findings is None:
+            # Evicted, or a digest key collision: match the file after all
+            return scan_file(record["path"], None, track)
+        record["findings"] = findings
+    elif record["digest"] and record["findings"] is not None:
+        cache.put(record["digest"], record["findings"])
+    return record
+
+def _merge_chunk(chunk: list, reused: dict, records: list, manifest, progress=None, cache=None, track=False) -> list:
+    """Reassemble a chunk's findings in walk order."""
+    if progress is not None:
+        progress.files_scanned += len(chunk)
+    findings = []
+    records = iter(records)
+    for file_path in chunk:
+        if file_path in reused:
+            findings.extend(reused[file_path])
+            continue
+        record = next(records)
+        if record is not None and cache is not None:
+            record = _resolve_cached(record, cache, track)
+        if record is None:
+            continue
+        if manifest is not None:
+            findings.extend(manifest.update(record))
+        else:
+            findings.extend(record["findings"])
+    if progress is not None:
+        progress.findings += len(findings)
+    return findings
+
+def _planned_chunks(files, chunk_size: int, manifest, progress):
+    for chunk in _chunked(files, max(1, chunk_size)):
+        if progress is not None:
+            progress.check_cancelled()
+            progress.files_walked += len(chunk)
+        yield _plan_chunk(chunk, manifest)
+
+def iter_scan_directory(path: str, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE, executor: str = "process", manifest=None, progress=None, files=None, cache=None):
+    """
+    Walk directory and yield candidate secrets, one list per chunk of files.
+    
+    With workers > 1 the walker feeds chunks of paths to a pool ("process" for
+    CPU-bound regex work, "thread" for I/O-bound trees such as network shares).
+    At most 2 * workers chunks are in flight, so the walk never runs far ahead
+    of the scanners, and chunks are yielded in walk order: the output is
+    identical to the serial path.
+    
+    When a FileManifest is given, files whose size, mtime and inode are
+    unchanged since the last scan are not read at all, files whose content
+    digest is unchanged are not re-matched, and both reuse the findings
+    recorded in the manifest. The caller commits the manifest afterwards.
+    
+    With a ResultCache, a file whose content digest the cache has seen (a
+    copied .env, a vendored config, a second checkout) takes its findings
+    from there, rebased onto its own path, instead of being matched. Pool
+    workers check against a snapshot of the cache taken when the pool
+    starts. The caller commits the cache afterwards.
+    
+    A ScanProgress, if given, is updated per chunk and checked for
+    cancellation between chunks. files replaces the default walk of path
+    with another iterable of (path, DirEntry or None) pairs, such as a
+    shared walker that also collects repo roots.
+    """
+    # Digests are needed to compare with the manifest and to key the cache
+    track = manifest is not None or cache is not None
+    if files is None:
+        files = walk_files(path)
+    plans = _planned_chunks(files, chunk_size, manifest, progress)
+    
+    if workers <= 1:
+        # The live key set: copies later in this same walk hit the cache too
+        known = cache.keys if cache is not None else ()
+        for chunk, reused, work in plans:
+            yield _merge_chunk(chunk, reused, scan_files(work, track, known), manifest, progress, cache, track)
+        return
+        
+    initargs = (cache.snapshot() if cache is not None else frozenset(),)
+    if executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs)
+        
+    try:
+        pending = deque()
+        for chunk, reused, work in plans:
+            pending.append((chunk, reused, pool.submit(scan_files, work, track)))
+            if len(pending) >= 2 * workers:
+                chunk, reused, future = pending.popleft()
+                yield _merge_chunk(chunk, reused, future.result(), manifest, progress, cache, track)
+        while pending:
+            chunk, reused, future = pending.popleft()
+            yield _merge_chunk(chunk, reused, future.result(), manifest, progress, cache, track)
+    finally:
+        # On cancellation or error, drop queued chunks instead of finishing them
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def scan_directory(path: str, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE, executor: str = "process", manifest=None, progress=None, files=None, cache=None) -> list:
     """Walk directory and return candidate secrets from files."""
     findings = []
+    for chunk_findings in iter_scan_directory(path, workers, chunk_size, executor, manifest, progress, files, cache):
+        findings.extend(chunk_findings)
+    return findings
+
+def _iter_windows(f):
+    """
+    Yield (window, owned) over a binary stream, with windows of at most
+    WINDOW_SIZE + WINDOW_OVERLAP bytes.
     
-    # Skip common ignore dirs
-    ignore_dirs = {'.git', 'node_modules', 'venv', '__pycache__', '.idea', '.vscode', 'dist', 'build'}
+    A window owns the matches starting in its first `owned` bytes; the rest is
+    overlap so a match straddling the cut is still seen whole. Cuts fall just
+    after a newline where possible, so the next window starts on a line.
+    """
+    full = WINDOW_SIZE + WINDOW_OVERLAP
+    window = f.read(full)
+    while True:
+        if len(window) < full:
+            yield window, len(window)
+            return
+        owned = window.rfind(b"\n", 0, WINDOW_SIZE) + 1 or WINDOW_SIZE
+        yield window, owned
+        window = window[owned:] + f.read(owned)
+
+def match_stream(f) -> list:
+    """
+    Run every pattern over a binary stream without decoding it.
     
-    for root, dirs, files in os.walk(path):
-        # Modify dirs in-place to skip ignored
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
+    Returns (pattern, line_num, secret_value, context) tuples grouped by
+    pattern in offset order. Only matched values and their lines are decoded;
+    memory stays bounded by the window size whatever the file size.
+    """
+    hits = []
+    line_base = 0
+    for window, owned in _iter_windows(f):
+        lines = LineIndex(window)
         
-        for file in files:
-            file_path = os.path.join(root, file)
-            
-            # Skip if too large
-            try:
-                if os.path.getsize(file_path) > MAX_FILE_SIZE:
-                    continue
-            except OSError:
-                continue
-                
-            # Skip if not text (simple check)
-            if not is_text_file(file_path):
-                continue
+        for pattern, match in MATCHER.iter_matches(window):
+            if match.start() >= owned:
+                continue  # Belongs to the next window
                 
-            file_findings = detect_secrets_in_file(file_path)
-            findings.extend(file_findings)
+            # Find line number
+            line_num = lines.line_of(match.start())
+            
+            # If groups exist, take the last one as the secret usually
+            secret_value = match.group(match.lastindex) if match.lastindex else match.group(0)
             
+            # Context (line content)
+            context = lines.line_text(line_num).decode('utf-8', errors='ignore')
+            
+            hits.append((pattern, line_base + line_num, secret_value.decode('utf-8', errors='ignore'), context))
+            
+        line_base += window.count(b"\n", 0, owned)
+            
+    # Multi-window files: restore the per-pattern ordering of a single pass
+    order = {id(p): i for i, p in enumerate(PATTERNS)}
+    hits.sort(key=lambda hit: order[id(hit[0])])
+    return hits
+
+def findings_from_hits(hits: list, source_type: str, path: str, **location) -> list:
+    """Build raw findings from match_stream hits; extra location keys follow path and line."""
+    findings = []
+    for pattern, line_num, secret_value, context in hits:
+        findings.append({
+            "source_type": source_type,
+            "location": {
+                "path": path,
+                "line": line_num,
+                **location
+            },
+            "secret_value": secret_value,
+            "username": None,
+            "domain": None,
+            "metadata": {
+                "pattern_name": pattern["name"],
+                "context": context.strip()[:100], # Limit context length
+                "score": pattern["score"]
+            }
+        })
     return findings
 
 def detect_secrets_in_file(path: str) -> list:
     """Run regex + heuristics against one file."""
-    findings = []
     try:
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-            
-        lines = content.splitlines()
-        
-        for pattern in PATTERNS:
-            for match in pattern["regex"].finditer(content):
-                # Find line number
-                start_index = match.start()
-                line_num = content.count('\n', 0, start_index) + 1
-                
-                # Extract match value
-                full_match = match.group(0)
-                # If groups exist, take the last one as the secret usually
-                secret_value = match.group(match.lastindex) if match.lastindex else full_match
-                
-                # Context (line content)
-                context = lines[line_num - 1] if line_num <= len(lines) else ""
-                
-                findings.append({
-                    "source_type": "file_secret",
-                    "location": {
-                        "path": path,
-                        "line": line_num
-                    },
-                    "secret_value": secret_value,
-                    "username": None,
-                    "domain": None,
-                    "metadata": {
-                        "pattern_name": pattern["name"],
-                        "context": context.strip()[:100], # Limit context length
-                        "score": pattern["score"]
-                    }
-                })
-                
+        with open(path, 'rb') as f:
+            hits = match_stream(f)
     except Exception as e:
         # print(f"Error scanning file {path}: {e}")
-        pass
+        return []
         
-    return findings
+    return findings_from_hits(hits, "file_secret", path)
@@ -1,118 +1,639 @@
+import io
 import os
+import stat
 import subprocess
-from backend.collectors.filesystem import detect_secrets_in_file, PATTERNS
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from backend.collectors.filesystem import findings_from_hits, match_stream, MAX_FILE_SIZE
+from backend.utils.filetypes import is_text_file
+from backend.utils.walker import IGNORE_DIRS, is_excluded, walk, walk_files
 
-def find_git_repos(root_paths: list) -> list:
-    """Return paths to .git repos."""
+NULL_OID = "0" * 40
+# Gitlinks (submodules) and symlinks have no content worth scanning
+SKIP_MODES = {"160000", "120000"}
+# Same heuristic git uses to decide a blob is binary
+BINARY_SNIFF_BYTES = 8000
+# Larger blobs are streamed through the matcher, and so are their parents
+# to drop secrets they already had, instead of being held in memory to
+# find the new lines
+HISTORY_DIFF_MAX_SIZE = 1024 * 1024 * 4  # 4MB
+
+class GitProcessLimiter:
+    """
+    Caps how many git subprocesses run at once across all scanning threads.
+    
+    A caller that needs several processes alive together (a history walk
+    pairs `git log` with `git cat-file`) takes its slots in one step, so two
+    threads can never each hold half of what they need.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def resize(self, limit: int):
+        with self._cond:
+            self.limit = max(1, limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slots(self, count: int = 1):
+        with self._cond:
+            count = min(count, self.limit)
+            while self.in_use + count > self.limit:
+                self._cond.wait()
+            self.in_use += count
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= count
+                self._cond.notify_all()
+
+GIT_PROCESSES = GitProcessLimiter(os.cpu_count() or 1)
+
+def repo_size(repo_path: str) -> int:
+    """Rough size of a repo's history: bytes in its pack files (loose objects aren't counted)."""
+    total = 0
+    try:
+        with os.scandir(os.path.join(repo_path, '.git', 'objects', 'pack')) as entries:
+            for entry in entries:
+                if entry.name.endswith('.pack'):
+                    total += entry.stat().st_size
+    except OSError:
+        pass
+    return total
+
+def iter_scan_repos(repos: list, scan_repo, workers: int = 1, failed: list = None):
+    """
+    Run scan_repo(repo) for every repo, up to workers at a time, yielding (repo, findings) as each finishes.
+    
+    The largest repos start first so one big history doesn't begin last and
+    set the total wall time. Repos are started only as others finish, so at
+    most workers results are held while the consumer works on one. A
+    failing repo is reported and yields no findings; pass a list as failed
+    to collect those repos.
+    """
+    pending = iter(sorted(repos, key=repo_size, reverse=True))
+    workers = max(1, workers)
+    running = {}
+    pool = ThreadPoolExecutor(max_workers=workers)
+    
+    def fill():
+        while len(running) < workers:
+            repo = next(pending, None)
+            if repo is None:
+                return
+            running[pool.submit(scan_repo, repo)] = repo
+            
+    try:
+        fill()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                repo = running.pop(future)
+                try:
+                    found = future.result()
+                except Exception as e:
+                    print(f"Error scanning git repo {repo}: {e}")
+                    found = []
+                    if failed is not None:
+                        failed.append(repo)
+                # Keep the workers busy while the consumer takes this one
+                fill()
+                yield repo, found
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def scan_repos(repos: list, scan_repo, workers: int = 1, on_done=None, failed: list = None) -> list:
+    """
+    Run scan_repo(repo) for every repo, up to workers at a time (see iter_scan_repos).
+    
+    on_done(repo, findings) is called as soon as a repo finishes. Findings
+    come back in the order of repos, whatever order the scans finished in.
+    """
+    results = {}
+    for repo, found in iter_scan_repos(repos, scan_repo, workers, failed):
+        results[repo] = found
+        if on_done:
+            on_done(repo, found)
+            
+    findings = []
+    for repo in repos:
+        findings.extend(results.get(repo, []))
+    return findings
+
+def find_git_repos(root_paths: list, exclude_globs=()) -> list:
+    """Return paths to .git repos, nested ones included."""
     repos = []
     for root_path in root_paths:
         if not os.path.exists(root_path):
             continue
-            
-        for root, dirs, files in os.walk(root_path):
-            if '.git' in dirs:
-                repos.append(root)
-                # Don't recurse into a git repo (submodules handled separately usually, or just simple scan)
-                dirs.remove('.git') 
-                
+        for kind, path, _ in walk(root_path, exclude_globs=exclude_globs, repo_files=False):
+            if kind == "repo":
+                repos.append(path)
     return repos
 
-def scan_git_working_tree(repo_path: str) -> list:
-    """Search working tree for secrets."""
-    findings = []
-    try:
-        # Get list of tracked files
+def _git_fields(repo_path: str, args: list) -> list:
+    """Run a git command with -z output and return its NUL-separated fields."""
+    with GIT_PROCESSES.slots():
         result = subprocess.run(
-            ['git', 'ls-files'], 
-            cwd=repo_path, 
-            capture_output=True, 
-            text=True, 
+            ['git', *args],
+            cwd=repo_path,
+            capture_output=True,
             check=True
         )
-        files = result.stdout.splitlines()
+    return [f.decode("utf-8", errors="surrogateescape") for f in result.stdout.split(b"\0") if f]
+
+def index_blobs(repo_path: str) -> dict:
+    """
+    Return mapping path -> blob id from the git index, in index order.
+    
+    Submodules and symlinks are left out; a path with merge conflicts maps
+    to None, since no single blob describes it.
+    """
+    blobs = {}
+    for field in _git_fields(repo_path, ['ls-files', '-s', '-z']):
+        # <mode> <blob id> <stage>\t<path>
+        info, path = field.split("\t", 1)
+        mode, blob_id, stage = info.split(" ")
+        if mode in SKIP_MODES:
+            continue
+        blobs[path] = blob_id if stage == "0" and path not in blobs else None
+    return blobs
+
+def _read_file_hits(full_path: str, size: int) -> list:
+    """Match a working-tree file, with the filesystem collector's size and type filters."""
+    if size > MAX_FILE_SIZE or not is_text_file(full_path):
+        return []
+    try:
+        with open(full_path, 'rb') as f:
+            return match_stream(f)
+    except OSError:
+        return []
+
+def _scan_worktree_file(repo_path: str, full_path: str, blob_id: str, blob_cache: dict, manifest, ignored: bool = False) -> list:
+    """
+    Findings for one working-tree file, or None if it isn't a regular file.
+    
+    blob_id is set only when the file's content matches the index. Then the
+    file isn't read if the manifest recorded that same blob or the run
+    already matched it. Ignored files are reported as plain file secrets,
+    the way the filesystem collector would.
+    """
+    try:
+        st = os.stat(full_path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+        
+    previous_digest = None
+    if manifest is not None:
+        reused, previous_digest = manifest.check(full_path)
+        if reused is not None:
+            return reused
+            
+    # The blob id doubles as the manifest digest: both identify the content
+    record = {
+        "path": full_path,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "inode": st.st_ino,
+        "digest": blob_id,
+        "findings": None
+    }
+    if manifest is not None and blob_id and blob_id == previous_digest:
+        # Touched but not changed: the manifest's findings still hold
+        return manifest.update(record)
+        
+    if blob_id and blob_id in blob_cache:
+        hits = blob_cache[blob_id]
+    else:
+        hits = _read_file_hits(full_path, st.st_size)
+        if blob_id:
+            blob_cache[blob_id] = hits
+            
+    if ignored:
+        record["findings"] = findings_from_hits(hits or (), "file_secret", full_path)
+    else:
+        record["findings"] = findings_from_hits(hits or (), "git_secret", full_path, repo=repo_path)
+    return manifest.update(record) if manifest is not None else record["findings"]
+
+def _is_excluded_path(full_path: str, path: str, exclude_globs) -> bool:
+    # Name globs prune whole directories in the walker, so test every component
+    return any(is_excluded(full_path, part, exclude_globs) for part in path.rstrip("/").split("/"))
+
+def _ignored_files(repo_path: str, honor_gitignore: bool, exclude_globs):
+    """
+    Yield paths of the repo's git-ignored files.
+    
+    Whole ignored directories are skipped when honor_gitignore is set, the
+    same as the filesystem collector's ignore dirs; otherwise they are
+    walked. Ignored files themselves are always yielded: a local .env is
+    ignored precisely because it holds secrets.
+    """
+    for path in _git_fields(repo_path, ['ls-files', '--others', '--ignored', '--exclude-standard', '--directory', '-z']):
+        parts = path.rstrip("/").split("/")
+        full_path = os.path.join(repo_path, *parts)
+        if any(part in IGNORE_DIRS for part in parts) or _is_excluded_path(full_path, path, exclude_globs):
+            continue
+        if not path.endswith("/"):
+            yield full_path
+        elif not honor_gitignore:
+            for file_path, _ in walk_files(full_path, exclude_globs=exclude_globs, repo_files=False):
+                yield file_path
+
+def git_ignored_dirs(repo_path: str) -> list:
+    """
+    Full paths of the repo's git-ignored directories, for the walker to prune.
+    
+    Empty if git can't list the repo: the walk then enters them as usual.
+    """
+    try:
+        fields = _git_fields(repo_path, ['ls-files', '--others', '--ignored', '--exclude-standard', '--directory', '-z'])
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    return [os.path.join(repo_path, *path.rstrip("/").split("/")) for path in fields if path.endswith("/")]
+
+def scan_git_working_tree(repo_path: str, blob_cache: dict = None, manifest=None, honor_gitignore: bool = True, exclude_globs=()) -> list:
+    """
+    Search working tree for secrets.
+    
+    Covers every file under the repo root, so the filesystem walk can leave
+    repos to this collector and each file is scanned once per run: tracked
+    and untracked files as git secrets, ignored ones as file secrets (see
+    _ignored_files). Files that match the index are identified by blob id,
+    so a blob already matched this run (by another repo, or by history) or
+    recorded in the manifest for that path is not read again; modified and
+    untracked files are.
+    
+    Returns None if git can't list the repo (no git binary, a broken or
+    half-cloned repo): then nothing under it was scanned, and the caller
+    has to fall back to scanning its files directly.
+    """
+    findings = []
+    blob_cache = {} if blob_cache is None else blob_cache
+    try:
+        index = index_blobs(repo_path)
+        modified = set(_git_fields(repo_path, ['diff', '--name-only', '-z']))
+        untracked = _git_fields(repo_path, ['ls-files', '--others', '--exclude-standard', '-z'])
+        ignored = list(_ignored_files(repo_path, honor_gitignore, exclude_globs))
+    except Exception as e:
+        print(f"Could not list git repo {repo_path}: {e}")
+        return None
+        
+    try:
+        paths = [(path, None if path in modified else blob_id) for path, blob_id in index.items()]
+        paths.extend((path, None) for path in untracked)
         
-        for file in files:
-            full_path = os.path.join(repo_path, file)
-            if os.path.exists(full_path):
-                file_findings = detect_secrets_in_file(full_path)
-                # Tag as git_secret
-                for f in file_findings:
-                    f['source_type'] = 'git_secret'
-                    f['location']['repo'] = repo_path
-                findings.extend(file_findings)
+        for path, blob_id in paths:
+            full_path = os.path.join(repo_path, *path.split("/"))
+            if exclude_globs and _is_excluded_path(full_path, path, exclude_globs):
+                continue
+            found = _scan_worktree_file(repo_path, full_path, blob_id, blob_cache, manifest)
+            if found is not None:
+                findings.extend(found)
+                
+        for full_path in ignored:
+            found = _scan_worktree_file(repo_path, full_path, None, blob_cache, manifest, ignored=True)
+            if found is not None:
+                findings.extend(found)
                 
-    except subprocess.CalledProcessError:
-        pass
     except Exception as e:
         print(f"Error scanning git repo {repo_path}: {e}")
         
     return findings
 
-def scan_git_history(repo_path: str, max_commits: int = 500) -> list:
-    """Search commit history for secrets."""
-    findings = []
-    try:
-        # git log -p -n 500
-        # We process the output line by line.
-        # This is a simple implementation. A robust one would parse diff headers.
+class CatFileBatch:
+    """
+    One long-lived `git cat-file --batch` process for reading objects by id.
+    
+    Spawning git per blob costs more than reading the blob; the batch process
+    answers requests over a pipe for the whole history walk.
+    """
+
+    def __init__(self, repo_path: str):
+        self.process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def read(self, object_id: str, max_size: int = None) -> bytes:
+        """Return a blob's contents, or None if it is missing, not a blob or too large."""
+        with self.open(object_id, max_size) as blob:
+            return blob.read() if blob is not None else None
+
+    @contextmanager
+    def open(self, object_id: str, max_size: int = None):
+        """
+        Yield a BlobStream over a blob's contents, or None if it is missing, not a blob or too large.
+        
+        Whatever the caller leaves unread is drained off the pipe on exit.
+        """
+        self.process.stdin.write(object_id.encode("ascii") + b"\n")
+        self.process.stdin.flush()
         
-        cmd = ['git', 'log', '-p', f'-n {max_commits}']
-        process = subprocess.Popen(
-            cmd, 
-            cwd=repo_path, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE,
+        # "<oid> <type> <size>\n", or "<oid> missing\n"
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            if not header:
+                raise RuntimeError("git cat-file exited unexpectedly")
+            yield None
+            return
+        size = int(header[2])
+        
+        blob = None
+        if header[1] == b"blob" and (max_size is None or size <= max_size):
+            blob = BlobStream(self.process.stdout, size)
+        try:
+            yield blob
+        finally:
+            remaining = blob.remaining if blob is not None else size
+            # Still have to drain it off the pipe, with its trailing newline
+            remaining += 1
+            while remaining:
+                remaining -= len(self.process.stdout.read(min(remaining, 1 << 20)))
+
+    def close(self):
+        if self.process.stdin:
+            self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class BlobStream:
+    """Binary stream over one blob's bytes on a cat-file pipe; peek() sniffs the start without consuming it."""
+
+    def __init__(self, stream, size: int):
+        self.stream = stream
+        self.size = size
+        self.remaining = size
+        self._head = b""
+
+    def peek(self, n: int) -> bytes:
+        if len(self._head) < n:
+            more = self.stream.read(min(n - len(self._head), self.remaining))
+            self.remaining -= len(more)
+            self._head += more
+        return self._head[:n]
+
+    def read(self, n: int = -1) -> bytes:
+        if n is None or n < 0:
+            n = len(self._head) + self.remaining
+        head, self._head = self._head[:n], self._head[n:]
+        want = min(n - len(head), self.remaining)
+        data = self.stream.read(want) if want else b""
+        self.remaining -= len(data)
+        return head + data if head else data
+
+def _iter_nul_fields(stream, chunk_size: int = 1 << 16):
+    """Split a -z formatted git output stream on NUL without reading it all first."""
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        fields = (pending + chunk).split(b"\0")
+        pending = fields.pop()
+        yield from fields
+    if pending:
+        yield pending
+
+def get_ref_tips(repo_path: str) -> dict:
+    """Return mapping ref -> object id for HEAD and every ref; empty for a repo with no commits."""
+    with GIT_PROCESSES.slots():
+        result = subprocess.run(
+            ['git', 'show-ref', '--head'],
+            cwd=repo_path,
+            capture_output=True,
             text=True,
-            errors='ignore'
+            errors='surrogateescape'
         )
+    tips = {}
+    for line in result.stdout.splitlines():
+        object_id, ref = line.split(" ", 1)
+        tips[ref] = object_id
+    return tips
+
+def _existing_objects(repo_path: str, object_ids) -> set:
+    """The subset of object_ids still present in the repo (old tips may have been gc'd)."""
+    with GIT_PROCESSES.slots():
+        result = subprocess.run(
+            ['git', 'cat-file', '--batch-check'],
+            cwd=repo_path,
+            input="".join(f"{oid}\n" for oid in object_ids),
+            capture_output=True,
+            text=True
+        )
+    # "<oid> <type> <size>", or "<oid> missing"
+    return {line.split(" ")[0] for line in result.stdout.splitlines() if not line.endswith(" missing")}
+
+def iter_introduced_blobs(repo_path: str, tips, exclude=(), commits: set = None):
+    """
+    Yield (commit, path, parent_blob_id, blob_id) for every blob a commit
+    added or modified; parent_blob_id is None for added files.
+    
+    Walks `git log --raw` over commits reachable from tips but not from
+    exclude, oldest first, so the first time a blob id shows up is the commit
+    that introduced it. Deletions, submodules and symlinks are skipped.
+    Walked commit ids are added to commits if given.
+    """
+    if not tips:
+        return
+    cmd = [
+        'git', 'log', '--stdin', '--reverse',
+        '--raw', '--no-abbrev', '--no-renames', '-z', '--format=%x01%H'
+    ]
+    process = subprocess.Popen(
+        cmd, cwd=repo_path, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    try:
+        # git log reads all of stdin before it writes anything, so this can't deadlock
+        revisions = list(tips) + [f"^{oid}" for oid in exclude]
+        process.stdin.write("".join(f"{rev}\n" for rev in revisions).encode("ascii"))
+        process.stdin.close()
         
-        current_commit = None
-        current_file = None
+        commit = None
+        fields = _iter_nul_fields(process.stdout)
+        for field in fields:
+            field = field.lstrip(b"\n")
+            if field.startswith(b"\x01"):
+                commit = field[1:].decode("ascii")
+                if commits is not None:
+                    commits.add(commit)
+            elif field.startswith(b":"):
+                # :<src mode> <dst mode> <src id> <dst id> <status>\0<path>
+                src_mode, dst_mode, src_id, dst_id, status = field[1:].decode("ascii").split(" ")
+                path = next(fields).decode("utf-8", errors="surrogateescape")
+                if status.startswith("D") or dst_mode in SKIP_MODES or dst_id == NULL_OID:
+                    continue
+                parent_id = None if src_id == NULL_OID or src_mode in SKIP_MODES else src_id
+                yield commit, path, parent_id, dst_id
+    finally:
+        process.stdout.close()
+        process.wait()
+
+def _added_lines(parent: bytes, data: bytes) -> tuple:
+    """
+    Keep only the lines of data that do not appear anywhere in parent.
+    
+    Returns (buffer, line_numbers): the kept lines joined by newlines, and the
+    original 1-based line number of each. Cheaper than a real diff, and for
+    secret scanning equivalent: an unchanged line was already seen in parent.
+    """
+    known = set(parent.split(b"\n"))
+    lines = data.split(b"\n")
+    if known.issuperset(lines):
+        return b"", []
+    line_numbers = [n for n, line in enumerate(lines, 1) if line not in known]
+    return b"\n".join([lines[n - 1] for n in line_numbers]), line_numbers
+
+def _scan_blob(batch: CatFileBatch, parent_id: str, blob_id: str) -> tuple:
+    """
+    Match a blob, or only its new lines if it has a parent. Returns (hits, bytes read).
+    
+    Only blobs up to HISTORY_DIFF_MAX_SIZE, and their parents, are read
+    into memory to diff. Larger ones are streamed through the matcher in
+    bounded windows, and so is their parent: hits whose (pattern, value)
+    the parent already had are dropped instead of diffing lines.
+    """
+    with batch.open(blob_id, MAX_FILE_SIZE) as blob:
+        if blob is None or b"\0" in blob.peek(BINARY_SNIFF_BYTES):
+            return None, 0
+        if parent_id is None or blob.size > HISTORY_DIFF_MAX_SIZE:
+            hits, size = match_stream(blob), blob.size
+            data = None
+        else:
+            data = blob.read()
+            
+    if data is None:
+        if parent_id is not None and hits:
+            # The pipe is free again once the blob is drained
+            with batch.open(parent_id, MAX_FILE_SIZE) as parent:
+                if parent is not None and b"\0" not in parent.peek(BINARY_SNIFF_BYTES):
+                    known = {(pattern["name"], value) for pattern, _, value, _ in match_stream(parent)}
+                    hits = [hit for hit in hits if (hit[0]["name"], hit[2]) not in known]
+        return hits or None, size
         
-        # We'll read line by line
-        # This is memory efficient but we need to track context
+    buffer, line_numbers = data, None
+    parent = batch.read(parent_id, HISTORY_DIFF_MAX_SIZE)
+    if parent is not None and b"\0" not in parent[:BINARY_SNIFF_BYTES]:
+        buffer, line_numbers = _added_lines(parent, data)
         
-        for line in process.stdout:
-            line = line.rstrip()
-            
-            if line.startswith('commit '):
-                current_commit = line.split(' ')[1]
-                continue
-            
-            if line.startswith('diff --git'):
-                # diff --git a/file b/file
-                parts = line.split(' ')
-                if len(parts) >= 4:
-                    current_file = parts[-1].lstrip('b/')
-                continue
-                
-            # Only check added lines
-            if line.startswith('+') and not line.startswith('+++'):
-                content = line[1:]
-                for pattern in PATTERNS:
-                    match = pattern["regex"].search(content)
-                    if match:
-                        full_match = match.group(0)
-                        secret_value = match.group(match.lastindex) if match.lastindex else full_match
-                        
-                        findings.append({
-                            "source_type": "git_history",
-                            "location": {
-                                "repo": repo_path,
-                                "commit": current_commit,
-                                "path": current_file
-                            },
-                            "secret_value": secret_value,
-                            "username": None,
-                            "domain": None,
-                            "metadata": {
-                                "pattern_name": pattern["name"],
-                                "context": content.strip()[:100],
-                                "score": pattern["score"]
-                            }
-                        })
+    hits = match_stream(io.BytesIO(buffer))
+    if line_numbers is not None:
+        hits = [(pattern, line_numbers[n - 1], value, context) for pattern, n, value, context in hits]
+    return hits or None, len(data)
+
+def scan_git_history(repo_path: str, watermark=None, stats: dict = None, blob_cache: dict = None) -> list:
+    """
+    Search commit history for secrets.
+    
+    Blobs come from `git cat-file --batch` and go through the same matcher
+    as working-tree files. Added files are matched whole; for modified files
+    only lines missing from the parent blob are. Each (parent, blob) pair is
+    matched once however many branches carry it, and a secret is reported
+    once per path, at the commit that first introduced it.
+    
+    With a watermark (storage/git_state.py) only commits reachable from ref
+    tips that moved since the last scan are walked, and blobs scanned before
+    are skipped; an untouched repo costs one `git show-ref`. Without one the
+    whole history is walked. Pass a dict as stats to get commits, blobs,
+    bytes read and MB/s for the walk.
+    
+    blob_cache maps blob id -> hits of whole-blob matches and may be shared
+    with scan_git_working_tree and other repos for the rest of the run.
+    """
+    findings = []
+    blob_cache = {} if blob_cache is None else blob_cache
+    blob_hits = {}  # (parent id, blob id) -> hits of the blob's new lines
+    scanned_blobs = 0
+    reported = set()
+    commits = set()
+    scanned_bytes = 0
+    start = time.perf_counter()
+    
+    new_tips = []
+    
+    try:
+        tips = get_ref_tips(repo_path)
+        old_tips = set(watermark.tips.values()) if watermark else set()
+        new_tips = sorted(set(tips.values()) - old_tips)
+        exclude = _existing_objects(repo_path, old_tips) if new_tips and old_tips else set()
+        
+        # `git log` and `git cat-file` run side by side for the whole walk
+        with GIT_PROCESSES.slots(2), CatFileBatch(repo_path) as batch:
+            for commit, path, parent_id, blob_id in iter_introduced_blobs(repo_path, new_tips, exclude, commits):
+                key = (parent_id, blob_id)
+                if watermark and watermark.scanned_before(blob_id):
+                    # Reported by an earlier scan
+                    continue
+                if parent_id is None and blob_id in blob_cache:
+                    hits = blob_cache[blob_id]
+                elif key in blob_hits:
+                    hits = blob_hits[key]
+                else:
+                    hits, size = _scan_blob(batch, parent_id, blob_id)
+                    if parent_id is None:
+                        blob_cache[blob_id] = hits
+                    else:
+                        blob_hits[key] = hits
+                    scanned_blobs += 1
+                    scanned_bytes += size
+                    if watermark:
+                        watermark.mark_scanned(blob_id)
+                    
+                for pattern, line_num, secret_value, context in hits or ():
+                    seen = (path, pattern["name"], secret_value)
+                    if seen in reported:
+                        continue
+                    reported.add(seen)
+                    
+                    findings.append({
+                        "source_type": "git_history",
+                        "location": {
+                            "repo": repo_path,
+                            "commit": commit,
+                            "path": path,
+                            "line": line_num
+                        },
+                        "secret_value": secret_value,
+                        "username": None,
+                        "domain": None,
+                        "metadata": {
+                            "pattern_name": pattern["name"],
+                            "context": context.strip()[:100],
+                            "score": pattern["score"]
+                        }
+                    })
+                    
+        if watermark:
+            watermark.advance(tips)
                         
     except Exception as e:
         print(f"Error scanning git history {repo_path}: {e}")
         
+    if stats is not None:
+        elapsed = time.perf_counter() - start
+        stats.update({
+            "new_tips": len(new_tips),
+            "commits": len(commits),
+            "blobs": scanned_blobs,
+            "bytes": scanned_bytes,
+            "seconds": round(elapsed, 6),
+            "mb_per_second": round(scanned_bytes / (1024 * 1024) / elapsed, 2) if elapsed else 0.0
+        })
+        
     return findings
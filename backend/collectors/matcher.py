@@ -0,0 +1,108 @@
+import re
+from bisect import bisect_left
+
+
+_NEWLINE = re.compile("\n")
+_NEWLINE_BYTES = re.compile(b"\n")
+
+
+class LineIndex:
+    """Newline-offset index over a str or bytes buffer for O(log n) line lookups."""
+
+    def __init__(self, text):
+        self.text = text
+        self._offsets = None
+
+    @property
+    def offsets(self) -> list:
+        # Built on first use: most buffers never produce a match
+        if self._offsets is None:
+            newline = _NEWLINE if isinstance(self.text, str) else _NEWLINE_BYTES
+            self._offsets = [m.start() for m in newline.finditer(self.text)]
+        return self._offsets
+
+    def line_of(self, index: int) -> int:
+        """1-based line number of the character at index."""
+        return bisect_left(self.offsets, index) + 1
+
+    def line_text(self, line_num: int) -> str:
+        """Content of a 1-based line, without its newline."""
+        offsets = self.offsets
+        start = offsets[line_num - 2] + 1 if line_num > 1 else 0
+        end = offsets[line_num - 1] if line_num - 1 < len(offsets) else len(self.text)
+        return self.text[start:end]
+
+
+class SecretMatcher:
+    """
+    Runs every pattern over a buffer, using literal prefixes to skip work.
+
+    Each pattern may declare ``keywords``: literals that every match must start
+    with. Rather than letting ``re`` try the pattern at every offset, the
+    matcher finds the keyword occurrences with plain substring search and only
+    attempts an anchored match there. Case-insensitive patterns look their
+    keywords up in a lowercased copy of the buffer, made once per buffer.
+    Results are identical to running ``finditer`` for each pattern in order.
+
+    Buffers may be str or bytes; for bytes, byte-level twins of the patterns
+    are used so files can be matched without decoding them first.
+    """
+
+    def __init__(self, patterns: list):
+        self.patterns = list(patterns)
+        self._compiled = {str: [], bytes: []}
+        for pattern in self.patterns:
+            regex = pattern["regex"]
+            keywords = pattern.get("keywords")
+            if keywords and regex.flags & re.IGNORECASE:
+                keywords = [k.lower() for k in keywords]
+            self._compiled[str].append((regex, keywords))
+            self._compiled[bytes].append((
+                re.compile(regex.pattern.encode("utf-8"), regex.flags & ~re.UNICODE),
+                [k.encode("utf-8") for k in keywords] if keywords else keywords
+            ))
+
+    def iter_matches(self, text):
+        """Yield (pattern, match) pairs, grouped by pattern, in offset order."""
+        compiled = self._compiled[str if isinstance(text, str) else bytes]
+        folded = None
+        for pattern, (regex, keywords) in zip(self.patterns, compiled):
+            if not keywords:
+                for match in regex.finditer(text):
+                    yield pattern, match
+                continue
+
+            haystack = text
+            if regex.flags & re.IGNORECASE:
+                if folded is None:
+                    folded = text.lower()
+                    # bytes.lower() only folds ASCII; lowercasing some non-ASCII
+                    # characters in a str changes their length, which would
+                    # misalign offsets, so fall back to a full scan then
+                    if len(folded) != len(text):
+                        folded = False
+                if folded is False:
+                    for match in regex.finditer(text):
+                        yield pattern, match
+                    continue
+                haystack = folded
+
+            candidates = []
+            for keyword in keywords:
+                index = haystack.find(keyword)
+                while index != -1:
+                    candidates.append(index)
+                    index = haystack.find(keyword, index + 1)
+            if not candidates:
+                continue
+            candidates.sort()
+
+            # finditer semantics: matches of one pattern never overlap
+            resume_at = 0
+            for index in candidates:
+                if index < resume_at:
+                    continue
+                match = regex.match(text, index)
+                if match:
+                    yield pattern, match
+                    resume_at = max(match.end(), index + 1)
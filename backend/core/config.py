@@ -15,6 +15,25 @@ class Config:
         self.include_git_scans = True
         self.include_env_scans = True
         self.cloud_url = "" # e.g. "http://localhost:8080"
+        # Filesystem scan parallelism: workers <= 1 scans serially
+        self.scan_workers = os.cpu_count() or 1
+        self.scan_chunk_size = 64
+        self.scan_executor = "process" # or "thread" for I/O-bound trees
+        # Skip files unchanged since the last scan (see storage/manifest.py)
+        self.incremental_scans = True
+        # Repos scanned at once, and a cap on git subprocesses across all of them
+        self.git_workers = min(4, os.cpu_count() or 1)
+        self.git_max_processes = os.cpu_count() or 1
+        # Walk pruning: skip git-ignored directories, and paths matching these globs
+        self.honor_gitignore = True
+        self.exclude_globs = []
+        # Cap on the content-addressed result cache (storage/result_cache.py); 0 turns it off
+        self.result_cache_max_bytes = 32 * 1024 * 1024
+        # Processes for password strength analysis; workers <= 1 analyzes serially
+        self.detection_workers = os.cpu_count() or 1
+        # Risk score weights by feature name, over detect/scoring.py's DEFAULT_WEIGHTS.
+        # Changing them rescores stored findings without a rescan.
+        self.score_weights = {}
 
     @staticmethod
     def load() -> "Config":
@@ -31,6 +50,17 @@ class Config:
                     cfg.include_browser_scans = data.get("include_browser_scans", True)
                     cfg.include_git_scans = data.get("include_git_scans", True)
                     cfg.include_env_scans = data.get("include_env_scans", True)
+                    cfg.scan_workers = data.get("scan_workers", cfg.scan_workers)
+                    cfg.scan_chunk_size = data.get("scan_chunk_size", cfg.scan_chunk_size)
+                    cfg.scan_executor = data.get("scan_executor", cfg.scan_executor)
+                    cfg.incremental_scans = data.get("incremental_scans", True)
+                    cfg.git_workers = data.get("git_workers", cfg.git_workers)
+                    cfg.git_max_processes = data.get("git_max_processes", cfg.git_max_processes)
+                    cfg.honor_gitignore = data.get("honor_gitignore", True)
+                    cfg.exclude_globs = data.get("exclude_globs", [])
+                    cfg.result_cache_max_bytes = data.get("result_cache_max_bytes", cfg.result_cache_max_bytes)
+                    cfg.detection_workers = data.get("detection_workers", cfg.detection_workers)
+                    cfg.score_weights = data.get("score_weights", {})
             except Exception:
                 pass # Fallback to default
         return cfg
@@ -44,7 +74,18 @@ class Config:
             "scan_paths": self.scan_paths,
             "include_browser_scans": self.include_browser_scans,
             "include_git_scans": self.include_git_scans,
-            "include_env_scans": self.include_env_scans
+            "include_env_scans": self.include_env_scans,
+            "scan_workers": self.scan_workers,
+            "scan_chunk_size": self.scan_chunk_size,
+            "scan_executor": self.scan_executor,
+            "incremental_scans": self.incremental_scans,
+            "git_workers": self.git_workers,
+            "git_max_processes": self.git_max_processes,
+            "honor_gitignore": self.honor_gitignore,
+            "exclude_globs": self.exclude_globs,
+            "result_cache_max_bytes": self.result_cache_max_bytes,
+            "detection_workers": self.detection_workers,
+            "score_weights": self.score_weights
         }
         
         with open(config_path, 'w') as f:
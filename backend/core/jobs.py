@@ -0,0 +1,205 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from backend.utils.metrics import RssPeak, cpu_seconds
+
+MAX_JOB_HISTORY = 20
+
+class ScanCancelled(BaseException):
+    """
+    Raised inside a scan once cancellation is requested.
+    
+    A BaseException, like asyncio.CancelledError, so the collectors'
+    `except Exception` fallbacks don't swallow it.
+    """
+
+class ScanProgress:
+    """
+    Live counters for one scan: written by the pipeline, read by the API.
+    
+    Also keeps the timing breakdown of completed phases, which ends up in
+    the persisted scan log.
+    """
+
+    def __init__(self):
+        self.phase = "pending"
+        self.phases = []
+        self.files_walked = 0
+        self.files_scanned = 0
+        self.findings = 0
+        # Scan paths whose walk or git scans failed; their manifests are not saved
+        self.incomplete = []
+        self.started_at = time.time()
+        self._cancel = threading.Event()
+        # Streaming stages, and the time spent in them so far
+        self._stages = {}
+        self._stage_wall = 0.0
+        self._stage_cpu = 0.0
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Called by the pipeline between units of work."""
+        if self._cancel.is_set():
+            raise ScanCancelled()
+
+    def set_phase(self, phase: str):
+        self.check_cancelled()
+        self.phase = phase
+
+    @contextmanager
+    def timed_phase(self, name: str):
+        """
+        Enter a pipeline phase and time it.
+        
+        Yields the phase record; set its "items" to what the phase processed.
+        Wall time, CPU time and the phase's own peak RSS are filled in on exit. A collector
+        phase that yields into the streaming pipeline is not charged for the
+        time its findings spend in timed_stage() blocks.
+        """
+        self.set_phase(name)
+        record = {"name": name, "items": 0}
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        stage_wall, stage_cpu = self._stage_wall, self._stage_cpu
+        rss = RssPeak()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start - (self._stage_wall - stage_wall)
+            cpu = cpu_seconds() - cpu_start - (self._stage_cpu - stage_cpu)
+            record["wall_seconds"] = round(max(wall, 0.0), 6)
+            record["cpu_seconds"] = round(max(cpu, 0.0), 6)
+            record["peak_rss_bytes"] = rss.stop()
+            self.phases.append(record)
+
+    @contextmanager
+    def timed_stage(self, name: str):
+        """
+        Time one batch's pass through a streaming pipeline stage.
+
+        Every pass of a stage adds to the same record, so a stage reports its
+        total time and items (add to record["items"]) for the whole scan.
+        Records are added to phases by end_stages().
+        """
+        self.set_phase(name)
+        record = self._stages.get(name)
+        if record is None:
+            record = self._stages[name] = {"name": name, "items": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        rss = RssPeak()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+            self._stage_wall += wall
+            self._stage_cpu += cpu
+            record["wall_seconds"] = round(record["wall_seconds"] + wall, 6)
+            record["cpu_seconds"] = round(record["cpu_seconds"] + cpu, 6)
+            # The highest of any pass
+            peak = rss.stop()
+            if peak is not None and peak > (record.get("peak_rss_bytes") or 0):
+                record["peak_rss_bytes"] = peak
+
+    def end_stages(self):
+        """Add the streaming stages to phases, in the order they first ran."""
+        self.phases.extend(self._stages.values())
+        self._stages = {}
+
+    def snapshot(self) -> dict:
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        return {
+            "phase": self.phase,
+            "files_walked": self.files_walked,
+            "files_scanned": self.files_scanned,
+            "findings": self.findings,
+            "incomplete": list(self.incomplete),
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(self.files_scanned / elapsed, 1),
+            "phases": list(self.phases)
+        }
+
+class ScanJob:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.progress = ScanProgress()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.progress.snapshot(),
+            "result": self.result,
+            "error": self.error,
+            "finished_at": self.finished_at
+        }
+
+class ScanInProgress(Exception):
+    """Raised when a scan is requested while another one is running."""
+
+    def __init__(self, job):
+        super().__init__(f"Scan {job.id} is already running")
+        self.job = job
+
+class ScanJobManager:
+    """Runs scans one at a time on a background thread and keeps recent jobs."""
+
+    def __init__(self, service):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan")
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def start(self) -> ScanJob:
+        """Queue a new scan and return its job immediately."""
+        with self.lock:
+            active = next((job for job in self.jobs.values() if not job.done), None)
+            if active:
+                raise ScanInProgress(active)
+            job = ScanJob()
+            self.jobs[job.id] = job
+            while len(self.jobs) > MAX_JOB_HISTORY:
+                self.jobs.popitem(last=False)
+        self.executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: ScanJob):
+        job.status = "running"
+        try:
+            job.result = self.service.run_full_scan(progress=job.progress)
+            job.status = "succeeded"
+        except ScanCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.progress.phase = "done"
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> ScanJob:
+        return self.jobs.get(job_id)
+
+    def latest(self) -> ScanJob:
+        return next(reversed(self.jobs.values()), None)
+
+    def cancel(self, job_id: str) -> ScanJob:
+        job = self.jobs.get(job_id)
+        if job and not job.done:
+            job.progress.cancel()
+        return job
@@ -1,57 +1,163 @@
+import json
+import os
 from datetime import datetime
-from backend.collectors.browsers import run_browser_collectors
-from backend.collectors.filesystem import scan_directory
-from backend.collectors.git_scanner import find_git_repos, scan_git_working_tree, scan_git_history
+from backend.collectors.browsers import iter_browser_collectors
+from backend.collectors.filesystem import iter_scan_directory, pattern_set_version
+from backend.collectors.git_scanner import GIT_PROCESSES, git_ignored_dirs, iter_scan_repos, scan_git_working_tree, scan_git_history
 from backend.collectors.env_configs import scan_common_config_files
-from backend.normalize.findings import normalize_raw_finding
-from backend.detect.strength import analyze_strength_raw
-from backend.detect.reuse import calculate_reuse
+from backend.normalize.findings import IssueFlag, normalize_raw_finding
+from backend.detect.reuse import ReuseIndex
 from backend.detect.exposure import detect_exposure
-from backend.detect.scoring import compute_risk_score
-from backend.ai.classify import classify_secret
+from backend.detect.scoring import REUSE_BITS, SCORE_FEATURES, RiskModel, reuse_mask, score_mask, stored_score_mask
+from backend.detect.similarity import VariantIndex
+from backend.ai.classify import CLASSIFIER
 from backend.ai.explain import generate_explanation
+from backend.storage.manifest import FileManifest
+from backend.storage.git_state import GitWatermark
+from backend.storage.result_cache import ResultCache
+from backend.storage.strength_cache import StrengthCache
+from backend.utils.walker import walk_files, walk_repo_files
+from backend.core.jobs import ScanProgress, ScanCancelled
+
+# Findings carried through normalize → detect → enrich → persist at a time
+PIPELINE_BATCH_SIZE = 500
+# Findings per cloud sync request; pages are read from the database
+SYNC_BATCH_SIZE = 500
+
+def containing_root(roots, path: str) -> str:
+    """The longest of roots that is path or one of its parents, or None."""
+    matches = [root for root in roots if path == root or path.startswith(os.path.join(root, ""))]
+    return max(matches, key=len) if matches else None
 
 class ScanService:
     def __init__(self, db, config):
         self.db = db
         self.config = config
+        self._risk_model = None
 
-    def run_full_scan(self) -> dict:
-        """Orchestrates collectors → normalization → detection → AI enrichment."""
-        start_time = datetime.now()
-        
-        # 1. Collect
-        raw_findings = self.run_collectors()
-        
-        # 2. Normalize
-        findings = self.normalize_findings(raw_findings)
+    def run_full_scan(self, progress: ScanProgress = None) -> dict:
+        """
+        Orchestrates collectors → normalization → detection → AI enrichment.
         
-        # 3. Detect (Strength, Exposure, Reuse, Scoring)
-        self.run_detection(findings)
-        
-        # 4. AI Enrichment (Classification, Explanation)
-        self.run_ai_enrichment(findings)
+        Findings stream through the stages in batches (see run_pipeline), so
+        memory stays flat however much a scan finds. progress receives live
+        counters and phase names; cancelling it raises ScanCancelled at the
+        next checkpoint. Every run, including failed and cancelled ones, is
+        logged with its per-phase timings.
+        """
+        start_time = datetime.now()
+        progress = progress or ScanProgress()
+        count = 0
+        status = "failed"
+        error = None
         
-        # 5. Persist
-        for f in findings:
-            self.db.insert_finding(f)
+        try:
+            # Stored scores follow any change to the score weights
+            self.rescore_all_findings()
             
-        # 6. Cloud Sync (Optional)
-        if hasattr(self.config, 'cloud_url') and self.config.cloud_url:
-            self.sync_to_cloud(findings)
+            # 1-5. Collect, normalize, detect, enrich, persist
+            cloud = bool(getattr(self.config, 'cloud_url', None))
+            count = self.run_pipeline(progress)
+                
+            # 6. Cloud Sync (Optional)
+            if cloud:
+                with progress.timed_phase("sync") as phase:
+                    synced, changed = self.sync_to_cloud()
+                    phase["items"] = synced
+                    # Secrets other machines hold count as reused here too
+                    phase["rescored"] = self.rescore_reuse(changed)
+                    
+            # Scan paths that failed keep their stored findings and manifest
+            status = "partial" if progress.incomplete else "success"
+        except ScanCancelled:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            # Log scan; a failure here must not hide the scan's own outcome
+            end_time = datetime.now()
+            scan_id = None
+            try:
+                scan_id = self.db.log_scan(start_time, end_time, status, count, progress.phases, error)
+            except Exception as e:
+                print(f"Could not log scan: {e}")
             
-        # Log scan
-        end_time = datetime.now()
-        # self.db.log_scan(...) # TODO: Implement log_scan in DB
-        
         return {
-            "status": "success",
-            "findings_count": len(findings),
-            "duration_seconds": (end_time - start_time).total_seconds()
+            "status": status,
+            "scan_id": scan_id,
+            "findings_count": count,
+            "duration_seconds": (end_time - start_time).total_seconds(),
+            "phases": progress.phases
         }
 
-    def sync_to_cloud(self, findings: list):
-        """Push encrypted/hashed findings to cloud."""
+    def run_pipeline(self, progress: ScanProgress, keep: list = None) -> int:
+        """
+        Stream collector output through normalize → detect → enrich → persist.
+        
+        Each collector yields findings as it goes (the filesystem one per
+        chunk of files), and every batch of up to PIPELINE_BATCH_SIZE runs
+        through all four stages and is written before the next is taken, so
+        the first findings reach the database early. The filesystem pool
+        keeps at most 2 * scan_workers chunks in flight meanwhile: that is the
+        bound on what is held between collection and persistence. Secret
+        values are dropped once the batch is classified.
+        
+        Reuse counts come from a running index; once the stream ends, rows
+        written before the last copy of their secret turned up are rescored,
+        and findings whose secrets are variants of each other are flagged.
+        Pass a list as keep to also get the findings, minus secret values.
+        Returns the number of findings written.
+        """
+        strengths = StrengthCache(self.db)
+        reuse = ReuseIndex()
+        variants = VariantIndex(self.db.master_key)
+        retired = set()
+        count = 0
+        collected = self.iter_collectors(progress, retired)
+        try:
+            for raw_findings in collected:
+                for i in range(0, len(raw_findings), PIPELINE_BATCH_SIZE):
+                    batch = raw_findings[i:i + PIPELINE_BATCH_SIZE]
+                    with progress.timed_stage("normalize") as stage:
+                        findings = self.normalize_findings(batch)
+                        stage["items"] += len(findings)
+                    with progress.timed_stage("detect") as stage:
+                        self.run_detection(findings, strengths=strengths, reuse=reuse, variants=variants)
+                        stage["items"] += len(findings)
+                    with progress.timed_stage("enrich") as stage:
+                        self.run_ai_enrichment(findings)
+                        stage["items"] += len(findings)
+                    with progress.timed_stage("persist") as stage:
+                        stage["items"] += self.db.upsert_findings(findings)
+                    count += len(findings)
+                    progress.findings = count
+                    if keep is not None:
+                        keep.extend(findings)
+                        
+            with progress.timed_stage("detect"):
+                try:
+                    strengths.commit()
+                except Exception as e:
+                    print(f"Could not save strength cache: {e}")
+                # Retired rows lower the count of whatever else holds their secret
+                self.rescore_reuse(retired.union(reuse.reused()), keep or ())
+                self.apply_variant_clusters(variants, {digest.hex() for digest in reuse.counts}, keep or ())
+        finally:
+            collected.close()
+            progress.end_stages()
+        return count
+
+    def sync_to_cloud(self) -> tuple:
+        """
+        Push hashed findings to cloud, reading them from the database a page at a time.
+        
+        Each page's reply, {secret_hash: other machines holding it}, is saved
+        as it arrives. Returns (findings synced, hashes whose remote count
+        changed); rescore those once the sync is done. A failed request stops
+        the sync, keeping what earlier pages saved.
+        """
         import requests
         import platform
         import socket
@@ -65,61 +171,251 @@ class ScanService:
                 "os": platform.system()
             }, timeout=5)
             
-            # 2. Push Findings
-            payload = []
-            for f in findings:
-                # ONLY send metadata and hash. NEVER send the secret preview to cloud 
-                # unless you implement client-side public key encryption here.
-                payload.append({
-                    "agent_id": agent_id,
-                    "secret_hash": f.secret_hash,
-                    "risk_score": f.risk_score,
-                    "source_type": f.source_type,
-                    "metadata": f.metadata
-                })
-                
-            requests.post(f"{self.config.cloud_url}/api/v1/findings/sync", json=payload, timeout=5)
-            print(f"Synced {len(payload)} findings to cloud.")
+        except Exception as e:
+            print(f"Cloud sync failed: {e}")
+            return 0, set()
             
+        # 2. Push Findings
+        synced = 0
+        changed = set()
+        payload = []
+        # ONLY send metadata and hash. NEVER send the secret preview to cloud 
+        # unless you implement client-side public key encryption here.
+        rows = self.db.iter_findings(batch_size=SYNC_BATCH_SIZE,
+                                     fields=["secret_hash", "risk_score", "source_type", "metadata"])
+        try:
+            for row in rows:
+                payload.append({"agent_id": agent_id, **row})
+                if len(payload) >= SYNC_BATCH_SIZE:
+                    changed.update(self._post_findings(payload))
+                    synced += len(payload)
+                    payload = []
+            if payload:
+                changed.update(self._post_findings(payload))
+                synced += len(payload)
         except Exception as e:
             print(f"Cloud sync failed: {e}")
+            
+        print(f"Synced {synced} findings to cloud.")
+        return synced, changed
+        
+    def _post_findings(self, payload: list) -> list:
+        """Post one page of findings and save the reuse counts the cloud replies with."""
+        import requests
+        
+        response = requests.post(f"{self.config.cloud_url}/api/v1/findings/sync", json=payload, timeout=5)
+        return self.db.save_remote_reuse(response.json().get("reuse", {}))
 
-    def run_collectors(self) -> list:
+    def collect_git(self, progress: ScanProgress, phase: dict, repos: list, manifests: dict = None,
+                    failed: list = None):
+        """
+        Scan repos, several at once, yielding each repo's findings as it finishes; fills in the phase record.
+        
+        Working-tree files are recorded in the manifest of the scan path they
+        live under. One blob cache is shared by every repo's working tree and
+        history for the whole run. A repo's history watermark is saved only
+        once the consumer has taken its findings. Pass a list as failed to
+        collect the repos whose scan raised.
+        """
+        phase["repos"] = len(repos)
+        GIT_PROCESSES.resize(self.config.git_max_processes)
+        
+        manifests = manifests or {}
+        blob_cache = {}
+        watermarks = {}
+        fallbacks = []
+        history_bytes, history_seconds = 0, 0.0
+        
+        def manifest_for(repo):
+            root = containing_root(manifests, repo)
+            return manifests[root] if root else None
+        
+        def scan_repo(repo):
+            progress.check_cancelled()
+            found = scan_git_working_tree(
+                repo,
+                blob_cache=blob_cache,
+                manifest=manifest_for(repo),
+                honor_gitignore=self.config.honor_gitignore,
+                exclude_globs=self.config.exclude_globs
+            )
+            if found is None:
+                # The filesystem walk left this repo's files to git, which
+                # can't list them: scan them as plain files instead
+                found = [
+                    raw
+                    for chunk in iter_scan_directory(
+                        repo,
+                        workers=1,
+                        manifest=manifest_for(repo),
+                        progress=progress,
+                        files=walk_repo_files(repo, exclude_globs=self.config.exclude_globs)
+                    )
+                    for raw in chunk
+                ]
+                fallbacks.append(repo)
+            progress.check_cancelled()
+            watermark = GitWatermark(self.db, repo) if self.config.incremental_scans else None
+            stats = {}
+            found.extend(scan_git_history(repo, watermark=watermark, stats=stats, blob_cache=blob_cache))
+            watermarks[repo] = (watermark, stats)
+            return found
+            
+        for repo, found in iter_scan_repos(repos, scan_repo, workers=self.config.git_workers, failed=failed):
+            yield found
+            # Runs on this thread, so database writes never race
+            watermark, stats = watermarks.pop(repo, (None, {}))
+            if watermark:
+                watermark.commit()
+            history_bytes += stats.get("bytes", 0)
+            history_seconds += stats.get("seconds", 0.0)
+            
+        phase["history_bytes"] = history_bytes
+        phase["filesystem_fallbacks"] = len(fallbacks)
+        if history_seconds:
+            phase["history_mb_per_second"] = round(history_bytes / (1024 * 1024) / history_seconds, 2)
+
+    def run_collectors(self, progress: ScanProgress = None) -> list:
         """Runs all collectors and returns raw findings."""
-        raw_findings = []
+        progress = progress or ScanProgress()
+        raw_findings = [raw for found in self.iter_collectors(progress) for raw in found]
+        progress.findings = len(raw_findings)
+        return raw_findings
+
+    def iter_collectors(self, progress: ScanProgress, retired: set = None):
+        """
+        Run all collectors, yielding raw findings a list at a time as they are found.
         
+        Manifests and the result cache are committed only after the consumer
+        has taken every filesystem and git list, so an abandoned scan never
+        records files as done whose findings were not persisted. A scan
+        path whose walk or repo scans failed keeps its manifest as it was:
+        committing it would retire every file the scan never reached. Such
+        paths are listed in progress.incomplete. The stored
+        findings of changed files are retired before their new ones are
+        yielded; pass a set as retired to collect the secret hashes they held.
+        """
         # Browsers
         if self.config.include_browser_scans:
+            with progress.timed_phase("collect:browsers") as phase:
+                try:
+                    # One profile at a time
+                    for found in iter_browser_collectors():
+                        phase["items"] += len(found)
+                        if found:
+                            yield found
+                except Exception as e:
+                    print(f"Browser collector failed: {e}")
+                    
+        # One manifest per scan path, shared by the filesystem and git
+        # collectors and committed once both have run
+        manifests = {}
+        if self.config.incremental_scans:
+            for path in self.config.scan_paths:
+                try:
+                    manifests[path] = FileManifest(self.db, path)
+                except Exception as e:
+                    print(f"Could not load file manifest for {path}: {e}")
+                    
+        cache = None
+        if self.config.result_cache_max_bytes:
             try:
-                raw_findings.extend(run_browser_collectors())
+                cache = ResultCache(self.db, pattern_set_version(), self.config.result_cache_max_bytes)
             except Exception as e:
-                print(f"Browser collector failed: {e}")
-                
-        # Filesystem
-        for path in self.config.scan_paths:
-            try:
-                raw_findings.extend(scan_directory(path))
-            except Exception as e:
-                print(f"Filesystem collector failed for {path}: {e}")
+                print(f"Could not load result cache: {e}")
                 
+        # Filesystem. The same walk finds the git repos; when git scans are
+        # on, files inside a repo are left to the git collector.
+        repos = []
+        failed = set()
+        with progress.timed_phase("collect:filesystem") as phase:
+            walked, walk_seconds = 0, 0.0
+            for path in self.config.scan_paths:
+                if not os.path.exists(path):
+                    continue
+                walk_stats = {}
+                try:
+                    for found in iter_scan_directory(
+                        path,
+                        workers=self.config.scan_workers,
+                        chunk_size=self.config.scan_chunk_size,
+                        executor=self.config.scan_executor,
+                        manifest=manifests.get(path),
+                        progress=progress,
+                        cache=cache,
+                        files=walk_files(
+                            path,
+                            exclude_globs=self.config.exclude_globs,
+                            repo_files=not self.config.include_git_scans,
+                            repos=repos,
+                            stats=walk_stats,
+                            repo_ignored_dirs=git_ignored_dirs if self.config.honor_gitignore else None
+                        )
+                    ):
+                        phase["items"] += len(found)
+                        if path in manifests:
+                            manifests[path].retire_changed()
+                        if found:
+                            yield found
+                except Exception as e:
+                    print(f"Filesystem collector failed for {path}: {e}")
+                    failed.add(path)
+                walked += walk_stats.get("entries", 0)
+                walk_seconds += walk_stats.get("seconds", 0.0)
+            phase["files"] = progress.files_scanned
+            if cache:
+                phase["cache_hits"] = cache.hits
+            phase["walk_entries"] = walked
+            if walk_seconds:
+                phase["walk_entries_per_second"] = round(walked / walk_seconds, 1)
+            
         # Git
         if self.config.include_git_scans:
+            with progress.timed_phase("collect:git") as phase:
+                failed_repos = []
+                try:
+                    # One repo at a time, as each finishes
+                    for found in self.collect_git(progress, phase, repos, manifests, failed_repos):
+                        phase["items"] += len(found)
+                        for manifest in manifests.values():
+                            manifest.retire_changed()
+                        if found:
+                            yield found
+                except Exception as e:
+                    print(f"Git collector failed: {e}")
+                    failed_repos = repos
+                failed.update(containing_root(self.config.scan_paths, repo) for repo in failed_repos)
+                phase["failed_repos"] = len(failed_repos)
+                
+        failed.discard(None)
+        progress.incomplete = sorted(failed)
+        for path, manifest in manifests.items():
+            if path in failed:
+                print(f"Not saving file manifest for {path}: its scan did not complete")
+            else:
+                try:
+                    manifest.commit()
+                except Exception as e:
+                    print(f"Could not save file manifest for {path}: {e}")
+            if retired is not None:
+                retired |= manifest.retired
+        if cache:
             try:
-                repos = find_git_repos(self.config.scan_paths)
-                for repo in repos:
-                    raw_findings.extend(scan_git_working_tree(repo))
-                    raw_findings.extend(scan_git_history(repo))
+                cache.commit()
             except Exception as e:
-                print(f"Git collector failed: {e}")
+                print(f"Could not save result cache: {e}")
                 
         # Env/Config
         if self.config.include_env_scans:
-            try:
-                raw_findings.extend(scan_common_config_files())
-            except Exception as e:
-                print(f"Env collector failed: {e}")
-                
-        return raw_findings
+            with progress.timed_phase("collect:env") as phase:
+                found = []
+                try:
+                    found = scan_common_config_files()
+                    phase["items"] = len(found)
+                except Exception as e:
+                    print(f"Env collector failed: {e}")
+                if found:
+                    yield found
 
     def normalize_findings(self, raw_findings: list) -> list:
         """Converts raw collector results into canonical CredentialFinding objects."""
@@ -131,46 +427,198 @@ class ScanService:
                 print(f"Normalization failed for finding: {e}")
         return normalized
 
-    def run_detection(self, findings: list) -> list:
-        """Runs scoring modules and updates DB with risk scores."""
-        # 1. Strength & Exposure (Per finding)
+    def run_detection(self, findings: list, strengths: StrengthCache = None, reuse: ReuseIndex = None,
+                      variants: VariantIndex = None) -> list:
+        """
+        Runs scoring modules over a batch of findings.
+        
+        A streaming scan passes its StrengthCache, ReuseIndex and
+        VariantIndex, which carry state across batches (the caller commits
+        the cache and applies the variant clusters); by default the batch is
+        scored on its own.
+        """
+        standalone = strengths is None
+        strengths = strengths or StrengthCache(self.db)
+        reuse = reuse or ReuseIndex()
+        
+        # 1. Strength & Exposure (Per finding). Strength is analyzed once
+        # per distinct secret, ever: earlier results come from the cache.
+        # New secrets are spread over detection_workers processes.
+        pairs = {}
+        for f in findings:
+            if f._secret_value:
+                pairs.setdefault(f.secret_hash, f._secret_value)
+        strengths.analyze_all(pairs, workers=self.config.detection_workers)
+        
         for f in findings:
             # Strength
             if f._secret_value:
-                strength = analyze_strength_raw(f._secret_value)
-                f.issue_flags.extend(strength.get("flags", []))
+                strength = strengths.analyze(f.secret_hash, f._secret_value)
+                f.flags |= IssueFlag.from_names(strength.get("flags", []))
                 f.metadata["strength_score"] = strength.get("score")
                 f.metadata["entropy"] = strength.get("entropy")
+                # Machine tokens are random: they have no variants
+                if variants is not None and not strength.get("machine_token"):
+                    variants.add(f.secret_hash, f._secret_value)
                 
             # Exposure
             exposure_flags = detect_exposure(f)
-            f.issue_flags.extend(exposure_flags)
+            f.flags |= IssueFlag.from_names(exposure_flags)
             
-        # 2. Reuse (Batch)
-        # Get existing reuse groups from DB to compare against
-        db_reuse = self.db.get_reuse_groups()
-        reuse_counts = calculate_reuse(findings, db_reuse)
+        if standalone:
+            try:
+                strengths.commit()
+            except Exception as e:
+                print(f"Could not save strength cache: {e}")
+                
+        # 2. Reuse, counted across every batch so far and against the
+        # stored index (earlier scans, other synced machines)
+        hashes = {f.secret_hash for f in findings}
+        try:
+            known, stored = self.db.get_reuse_counts(hashes), self.db.get_finding_keys(hashes)
+        except Exception as e:
+            print(f"Could not read reuse index: {e}")
+            known, stored = {}, set()
+        reuse_counts = reuse.add(findings, known, stored)
         
-        # 3. Scoring (Per finding)
+        # 3. Scoring: each finding's inputs as a mask, then the whole batch
+        # through the weighted sum at once
         for f in findings:
-            count = reuse_counts.get(f.secret_hash, 0)
+            count = reuse_counts.get(f.secret_digest, 0)
             f.metadata["reuse_count"] = count
             if count > 1:
-                f.issue_flags.append("reused_password")
-                
-            f.risk_score = compute_risk_score(f, count)
+                f.flags |= IssueFlag.REUSED_PASSWORD
+            f.score_mask = score_mask(f, count)
             
+        self.risk_model().score_batch(findings)
         return findings
 
+    def risk_model(self) -> RiskModel:
+        """The risk model for the configured score weights."""
+        weights = self.config.score_weights or {}
+        if self._risk_model is None or self._risk_model.overrides != weights:
+            try:
+                self._risk_model = RiskModel(weights)
+            except ValueError as e:
+                print(f"Ignoring score weights: {e}")
+                self._risk_model = RiskModel()
+                # Don't retry the bad weights on every call
+                self._risk_model.overrides = weights
+        return self._risk_model
+
+    def rescore_all_findings(self) -> int:
+        """
+        Recompute every stored risk score if the score weights changed since they were computed.
+        
+        Each row keeps its score inputs as a mask, so this is one UPDATE
+        inside the database rather than a rescan. Rows stored before masks
+        existed get theirs from their flags first. Returns the number of rows rescored.
+        """
+        model = self.risk_model()
+        if self.db.get_score_weights() == model.weights:
+            return 0
+        masks = []
+        for row in self.db.get_unmasked_rows():
+            metadata = json.loads(row['metadata_json'] or "{}")
+            flags = json.loads(row['issue_flags_json'] or "[]")
+            masks.append((stored_score_mask(flags, row['domain'], metadata.get("reuse_count") or 0), row['id']))
+        return self.db.rescore_findings(SCORE_FEATURES, model.weights, masks)
+
+    def rescore_reuse(self, hashes, findings=()) -> int:
+        """
+        Bring the reuse count and score of every row holding these secrets up to date.
+        
+        Counts come from the reuse index, so they cover earlier scans and
+        other synced machines. Any in-memory findings passed in are updated
+        too. Returns the number of rows updated.
+        """
+        hashes = list(hashes)
+        if not hashes:
+            return 0
+        counts = self.db.get_reuse_counts(hashes)
+        model = self.risk_model()
+        
+        targets = set(hashes)
+        for f in findings:
+            count = counts.get(f.secret_hash, 0)
+            if f.secret_hash in targets and f.metadata.get("reuse_count") != count:
+                f.metadata["reuse_count"] = count
+                f.score_mask = (f.score_mask & ~REUSE_BITS) | reuse_mask(count)
+                f.risk_score = model.score(f.score_mask)
+                if count > 1:
+                    f.flags |= IssueFlag.REUSED_PASSWORD
+                else:
+                    f.flags &= ~IssueFlag.REUSED_PASSWORD
+                    
+        updates = []
+        for row in self.db.get_reuse_rows(hashes):
+            metadata = json.loads(row['metadata_json'] or "{}")
+            count = counts.get(row['secret_hash'], 0)
+            if metadata.get("reuse_count") == count:
+                continue
+            flags = [flag for flag in json.loads(row['issue_flags_json'] or "[]") if flag != "reused_password"]
+            mask = row['score_mask']
+            if mask is None:
+                mask = stored_score_mask(flags, row['domain'])
+            mask = (mask & ~REUSE_BITS) | reuse_mask(count)
+            metadata["reuse_count"] = count
+            if count > 1:
+                flags.append("reused_password")
+            updates.append((model.score(mask), mask, json.dumps(metadata), json.dumps(flags), row['id']))
+        return self.db.update_reuse_rows(updates)
+
+    def apply_variant_clusters(self, variants: VariantIndex, scanned, findings=()) -> int:
+        """
+        Store variant cluster ids and the variant_reuse flag on the rows of the scanned secrets.
+        
+        Rows whose secret was scanned but no longer has a variant leave their
+        cluster. Any in-memory findings passed in are updated too. Returns
+        the number of rows updated.
+        """
+        clusters = variants.clusters()
+        model = self.risk_model()
+        bit = int(IssueFlag.VARIANT_REUSE)
+        for f in findings:
+            if f.secret_hash in clusters:
+                if not f.flags & IssueFlag.VARIANT_REUSE:
+                    f.flags |= IssueFlag.VARIANT_REUSE
+                    f.score_mask |= bit
+                    f.risk_score = model.score(f.score_mask)
+                    
+        hashes = set(clusters) | (self.db.get_variant_hashes() & set(scanned))
+        updates = []
+        for row in self.db.get_variant_rows(hashes):
+            cluster = clusters.get(row['secret_hash'])
+            flags = json.loads(row['issue_flags_json'] or "[]")
+            flagged = "variant_reuse" in flags
+            if row['variant_cluster'] == cluster and flagged == bool(cluster):
+                continue
+            mask = row['score_mask']
+            if mask is None:
+                metadata = json.loads(row['metadata_json'] or "{}")
+                mask = stored_score_mask(flags, row['domain'], metadata.get("reuse_count") or 0)
+            if cluster and not flagged:
+                flags.append("variant_reuse")
+                mask |= bit
+            elif flagged and not cluster:
+                flags.remove("variant_reuse")
+                mask &= ~bit
+            updates.append((model.score(mask), mask, json.dumps(flags), cluster, row['id']))
+        return self.db.update_variant_rows(updates)
+
     def run_ai_enrichment(self, findings: list) -> None:
-        """Adds AI classification + explanations to high-risk findings."""
+        """
+        Adds AI classification + explanations to a batch of findings.
+        
+        Every finding is classified: the compiled rules cost microseconds
+        each. Token prefixes are read from the secret value, which is
+        dropped here once classification is done.
+        """
+        CLASSIFIER.classify_findings(findings)
         for f in findings:
-            # Only enrich high risk or unknown types
-            if f.risk_score > 40:
-                classification = classify_secret(f.metadata)
-                f.ai_type = classification.get("type")
-                f.ai_service_guess = classification.get("service_guess")
-                
-                # Generate explanation
-                # f.ai_explanation = generate_explanation(f) # TODO: Implement
+            # Nothing downstream needs the secret itself
+            f._secret_value = None
+            
+            # Generate explanation
+            # f.ai_explanation = generate_explanation(f) # TODO: Implement
 
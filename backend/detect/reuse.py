@@ -1,30 +1,50 @@
-def calculate_reuse(findings: list, db_reuse_groups: dict) -> dict:
+import json
+
+
+class ReuseIndex:
     """
-    Return mapping: secret_hash -> reuse_count.
-    findings: list of current scan findings (CredentialFinding objects)
-    db_reuse_groups: dict from DB.get_reuse_groups()
+    Reuse counts for the findings of a streaming scan, batch by batch.
+
+    A finding's count is the stored reuse index (earlier scans, other
+    synced machines, batches already written) plus the new rows its batch
+    is about to add. Later batches can raise the count of secrets scored
+    earlier, and retired rows can lower it, so flagged keeps every secret
+    whose rows may need rescoring once the stream ends. Holds one entry per
+    distinct secret, not per finding.
     """
-    reuse_counts = {}
-    
-    # Count in current batch
-    local_counts = {}
-    for f in findings:
-        h = f.secret_hash
-        local_counts[h] = local_counts.get(h, 0) + 1
-        
-    # Merge with DB stats
-    for h, count in local_counts.items():
-        db_count = len(db_reuse_groups.get(h, []))
-        # Total reuse is (db_count + current_scan_count) - overlap?
-        # Actually, simpler: just track if hash appears multiple times.
-        # If we are running a full scan, local_counts is the truth for the current state.
-        # If we are doing incremental, it's harder.
-        # Let's assume full scan for v1.
-        
-        total = count
-        # If we have historical data that isn't in this scan (e.g. other machines?), we might add it.
-        # For local app, let's just use local_counts as the primary source for "current reuse".
-        
-        reuse_counts[h] = total
-        
-    return reuse_counts
+
+    def __init__(self):
+        self.counts = {}
+        self.flagged = set()
+
+    def add(self, findings: list, known: dict = None, stored=()) -> dict:
+        """
+        Count a batch; returns the counts for the batch's secret digests.
+
+        known maps secret_hash to its indexed count; stored holds the
+        (secret_hash, location_json) keys that already have a row.
+        """
+        known = known or {}
+        counts = self.counts
+        new_rows = {}
+        keys = set()
+        for f in findings:
+            digest = f.secret_digest
+            if digest in counts:
+                # Seen in an earlier batch: those rows may be stale now
+                self.flagged.add(digest)
+            key = (f.secret_hash, json.dumps(f.location))
+            if key not in stored and key not in keys:
+                new_rows[digest] = new_rows.get(digest, 0) + 1
+            keys.add(key)
+        batch = {}
+        for f in findings:
+            digest = f.secret_digest
+            counts[digest] = counts.get(digest, 0) + 1
+            batch[digest] = known.get(f.secret_hash, 0) + new_rows.get(digest, 0)
+        self.flagged.update(digest for digest, count in batch.items() if count > 1)
+        return batch
+
+    def reused(self) -> list:
+        """secret_hash of every secret whose rows may need rescoring."""
+        return [digest.hex() for digest in self.flagged]
@@ -1,34 +1,100 @@
-def compute_risk_score(finding, reuse_count: int = 0) -> int:
-    """Assign score 0–100 based on weakness, reuse, exposure, domain importance."""
-    score = 0
-    
-    # 1. Domain Importance (Heuristic)
-    domain = finding.domain or ""
-    if any(x in domain for x in ['google', 'facebook', 'twitter', 'github', 'aws', 'azure', 'bank', 'chase', 'paypal']):
-        score += 40
-    elif domain:
-        score += 10
-        
+from backend.normalize.domains import IMPORTANT, OTHER, parse_domain
+from backend.normalize.findings import IssueFlag
+
+# Score inputs besides the issue flags, as bits above them. A finding's
+# score mask holds every input that is set, so its score is a sum of weights.
+IMPORTANT_DOMAIN = 1 << 16
+OTHER_DOMAIN = 1 << 17
+WIDELY_REUSED = 1 << 18
+
+# Feature name -> bit, as stored in the score_weights table
+SCORE_FEATURES = {flag.name.lower(): int(flag) for flag in IssueFlag}
+SCORE_FEATURES.update(important_domain=IMPORTANT_DOMAIN, other_domain=OTHER_DOMAIN, widely_reused=WIDELY_REUSED)
+
+DEFAULT_WEIGHTS = {
+    # 1. Domain Importance
+    "important_domain": 40,
+    "other_domain": 10,
     # 2. Weakness (Flags from strength analysis)
-    if "weak_password" in finding.issue_flags:
-        score += 20
-    if "short_password" in finding.issue_flags:
-        score += 10
-        
-    # 3. Reuse
+    "weak_password": 20,
+    "short_password": 10,
+    # 3. Reuse; widely reused (5+) adds to reused. Near-duplicates of
+    # another secret (Summer2024! / Summer2025!) weigh less than exact reuse.
+    "reused_password": 15,
+    "widely_reused": 15,
+    "variant_reuse": 10,
+    # 4. Exposure
+    "exposed_in_git_history": 20,
+    "committed_to_git": 30,
+    "plaintext_file": 15,
+    "insecure_location": 10,
+}
+
+REUSE_BITS = int(IssueFlag.REUSED_PASSWORD) | WIDELY_REUSED
+
+DOMAIN_TIER_BITS = {IMPORTANT: IMPORTANT_DOMAIN, OTHER: OTHER_DOMAIN}
+
+def domain_features(domain: str) -> int:
+    """Domain importance bits, from the site's tier in the domain index."""
+    return DOMAIN_TIER_BITS.get(parse_domain(domain).tier, 0) if domain else 0
+
+def reuse_mask(reuse_count: int) -> int:
+    """Reuse bits for a reuse count."""
+    mask = 0
     if reuse_count > 1:
-        score += 15
+        mask |= IssueFlag.REUSED_PASSWORD
     if reuse_count >= 5:
-        score += 15 # Cumulative
-        
-    # 4. Exposure
-    if "exposed_in_git_history" in finding.issue_flags:
-        score += 20
-    if "committed_to_git" in finding.issue_flags:
-        score += 30
-    if "plaintext_file" in finding.issue_flags:
-        score += 15
-    if "insecure_location" in finding.issue_flags:
-        score += 10
-        
-    return max(0, min(score, 100))
+        mask |= WIDELY_REUSED
+    return int(mask)
+
+def score_mask(finding, reuse_count: int = 0) -> int:
+    """Every score input of a finding, as bits."""
+    return (int(finding.flags) & ~REUSE_BITS) | reuse_mask(reuse_count) | domain_features(finding.domain or "")
+
+def stored_score_mask(flag_names: list, domain: str, reuse_count: int = 0) -> int:
+    """The score mask of a stored row that predates score masks."""
+    flags = int(IssueFlag.from_names(flag_names))
+    return (flags & ~REUSE_BITS) | reuse_mask(reuse_count) | domain_features(domain or "")
+
+class RiskModel:
+    """
+    Risk scores as a weighted sum over score-mask bits.
+
+    Findings share a handful of distinct masks, so each mask's score is
+    computed once and a batch is scored with one lookup per finding.
+    weights overrides DEFAULT_WEIGHTS by feature name.
+    """
+
+    def __init__(self, weights: dict = None):
+        self.overrides = dict(weights or {})
+        self.weights = {**DEFAULT_WEIGHTS, **self.overrides}
+        unknown = set(self.weights) - set(SCORE_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown score features: {', '.join(sorted(unknown))}")
+        # Weights come from config.json, where "20" or true slip in easily
+        invalid = [name for name, weight in self.weights.items() if type(weight) is not int]
+        if invalid:
+            raise ValueError(f"Score weights must be integers: {', '.join(sorted(invalid))}")
+        self._bits = [(SCORE_FEATURES[name], weight) for name, weight in self.weights.items() if weight]
+        self._scores = {}
+
+    def score(self, mask: int) -> int:
+        score = self._scores.get(mask)
+        if score is None:
+            score = sum(weight for bit, weight in self._bits if mask & bit)
+            score = self._scores[mask] = max(0, min(score, 100))
+        return score
+
+    def score_batch(self, findings: list) -> list:
+        """Set risk_score from each finding's score_mask; returns the scores."""
+        scores = self._scores
+        for f in findings:
+            score = scores.get(f.score_mask)
+            f.risk_score = score if score is not None else self.score(f.score_mask)
+        return [f.risk_score for f in findings]
+
+DEFAULT_MODEL = RiskModel()
+
+def compute_risk_score(finding, reuse_count: int = 0) -> int:
+    """Assign score 0–100 based on weakness, reuse, exposure, domain importance."""
+    return DEFAULT_MODEL.score(score_mask(finding, reuse_count))
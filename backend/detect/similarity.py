@@ -0,0 +1,128 @@
+# Variant password reuse: near-duplicate secrets such as Summer2024! / Summer2025!
+import hashlib
+import hmac
+import random
+
+# Leetspeak and look-alike substitutions undone before comparing
+LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s", "!": "i", "|": "l"})
+
+MIN_SKELETON_LENGTH = 4
+MIN_SHINGLE_LENGTH = 6
+SHINGLE_SIZE = 3
+# MinHash signature: BANDS * ROWS values; two secrets share a band bucket
+# with probability ~ 1 - (1 - J^ROWS)^BANDS for Jaccard similarity J
+BANDS = 8
+ROWS = 2
+# Estimated Jaccard similarity a band collision must reach to count
+MIN_SIMILARITY = 0.6
+
+_rng = random.Random(0x5EC12E7)
+_SALTS = [_rng.getrandbits(64) for _ in range(BANDS * ROWS)]
+
+
+def skeleton(secret_value: str) -> str:
+    """Lowercased letters of a secret with look-alikes undone; digits and symbols dropped."""
+    lowered = secret_value.lower()
+    # Trailing digits and symbols are what people bump between variants,
+    # so they go before look-alikes are mapped back to letters
+    core = lowered.rstrip("0123456789!@#$%^&*?.-_+=~") or lowered
+    return "".join(c for c in core.translate(LEET) if c.isalpha())
+
+
+def shingles(secret_value: str) -> set:
+    """Character n-grams of the normalized secret."""
+    text = secret_value.lower().translate(LEET)
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(grams: set) -> tuple:
+    """MinHash signature of a shingle set, one value per salt."""
+    hashes = [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") for g in grams]
+    # One 64-bit hash per shingle, xored with a salt per slot: a cheap
+    # stand-in for independent permutations that runs in C via map()
+    return tuple(min(map(salt.__xor__, hashes)) for salt in _SALTS)
+
+
+def similarity(a: tuple, b: tuple) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class VariantIndex:
+    """
+    Clusters of distinct secrets that are variants of each other.
+
+    Secrets are added while their plaintext is still in memory; only a keyed
+    hash of each skeleton and a MinHash signature are kept, and clusters()
+    returns opaque cluster ids. Secrets with the same skeleton are joined
+    outright; the rest are matched through LSH band buckets, each new secret
+    checked against its bucket's first member only, so the work grows
+    linearly with the number of secrets.
+    """
+
+    def __init__(self, key: bytes):
+        self.key = key
+        self.parent = {}
+        self.labels = {}
+        self.skeletons = {}
+        self.bands = {}
+
+    def _label(self, text: str) -> bytes:
+        return hmac.new(self.key, text.encode("utf-8"), hashlib.sha256).digest()[:16]
+
+    def _find(self, secret_hash: str) -> str:
+        parent = self.parent
+        root = secret_hash
+        while parent[root] != root:
+            root = parent[root]
+        while parent[secret_hash] != root:
+            parent[secret_hash], secret_hash = root, parent[secret_hash]
+        return root
+
+    def _union(self, a: str, b: str):
+        a, b = self._find(a), self._find(b)
+        if a != b:
+            # The smaller label wins, so ids don't depend on insertion order
+            if self.labels[b] < self.labels[a]:
+                a, b = b, a
+            self.parent[b] = a
+
+    def add(self, secret_hash: str, secret_value: str):
+        """Index one distinct secret; repeated or too-short ones are ignored."""
+        if secret_hash in self.parent:
+            return
+        skel = skeleton(secret_value)
+        grams = shingles(secret_value) if len(secret_value) >= MIN_SHINGLE_LENGTH else set()
+        if len(skel) < MIN_SKELETON_LENGTH and not grams:
+            return
+
+        label = self._label(skel)
+        self.parent[secret_hash] = secret_hash
+        self.labels[secret_hash] = label
+        if len(skel) >= MIN_SKELETON_LENGTH:
+            first = self.skeletons.setdefault(label, secret_hash)
+            if first != secret_hash:
+                self._union(first, secret_hash)
+
+        if grams:
+            signature = minhash(grams)
+            for band in range(BANDS):
+                key = (band, signature[band * ROWS:(band + 1) * ROWS])
+                first = self.bands.get(key)
+                if first is None:
+                    self.bands[key] = (secret_hash, signature)
+                elif similarity(first[1], signature) >= MIN_SIMILARITY:
+                    self._union(first[0], secret_hash)
+
+    def clusters(self) -> dict:
+        """secret_hash -> cluster id, for secrets with at least one variant."""
+        members = {}
+        for secret_hash in self.parent:
+            members.setdefault(self._find(secret_hash), []).append(secret_hash)
+        result = {}
+        for root, hashes in members.items():
+            if len(hashes) > 1:
+                cluster_id = hmac.new(self.key, b"variant-cluster:" + self.labels[root], hashlib.sha256).hexdigest()[:32]
+                for secret_hash in hashes:
+                    result[secret_hash] = cluster_id
+        return result
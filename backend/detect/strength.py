@@ -1,5 +1,28 @@
+import math
+import re
+import string
+from concurrent.futures import ProcessPoolExecutor
 from zxcvbn import zxcvbn
 
+# Bump when analysis results change, so cached results are recomputed
+STRENGTH_VERSION = "3"
+
+# Formats of machine-issued credentials, which are random by construction.
+# Only known prefixes followed by a token body of the issuer's length count:
+# a long, mixed password can look random and still be weak.
+MACHINE_TOKEN_FORMAT = re.compile(r"""
+      (?:AKIA|ASIA)[0-9A-Z]{16}                 # AWS access key ids
+    | xox[baprs]-[0-9A-Za-z-]{10,}              # Slack
+    | gh[pousr]_[0-9A-Za-z]{36,}                # GitHub
+    | github_pat_[0-9A-Za-z_]{22,}
+    | glpat-[0-9A-Za-z_-]{20,}                  # GitLab
+    | [sr]k_(?:live|test)_[0-9A-Za-z]{24,}      # Stripe
+    | sk-(?:proj-|svcacct-)?[0-9A-Za-z_-]{32,}  # OpenAI
+    | AIza[0-9A-Za-z_-]{35}                     # Google API keys
+""", re.VERBOSE)
+# Secrets per worker task; fewer zxcvbn candidates than this are analyzed in-process
+DETECTION_BATCH_SIZE = 64
+
 def analyze_strength(finding) -> dict:
     """Return flags about password strength, entropy, and weak patterns."""
     secret = finding.preview # We only have preview in finding object usually, BUT 
@@ -22,11 +45,43 @@ def analyze_strength(finding) -> dict:
     # and the Service layer calls it before finalizing the Finding object.
     pass
 
+def _charset_size(value: str) -> int:
+    size = 0
+    for chars in (string.ascii_lowercase, string.ascii_uppercase, string.digits):
+        if any(c in chars for c in value):
+            size += len(chars)
+    if any(not c.isalnum() for c in value):
+        size += 32
+    return size
+
+
+def machine_token_strength(secret_value: str) -> dict:
+    """
+    Strength of a machine-issued token, or None if it isn't in a known token format.
+
+    Tokens are random by construction, so zxcvbn (milliseconds per call) has
+    nothing to find in them: the guess count is estimated from length and
+    alphabet instead.
+    """
+    if not MACHINE_TOKEN_FORMAT.fullmatch(secret_value):
+        return None
+    return {
+        "score": 4,
+        "entropy": round(len(secret_value) * math.log10(_charset_size(secret_value)), 2),
+        "flags": [],
+        "machine_token": True
+    }
+
+
 def analyze_strength_raw(secret_value: str) -> dict:
     """Return flags about password strength."""
     if not secret_value:
         return {}
         
+    token = machine_token_strength(secret_value)
+    if token:
+        return token
+        
     results = zxcvbn(secret_value)
     score = results.get('score', 0)
     
@@ -41,3 +96,37 @@ def analyze_strength_raw(secret_value: str) -> dict:
         "entropy": results.get('guesses_log10', 0),
         "flags": flags
     }
+
+
+def analyze_strength_batch(pairs: list) -> list:
+    """Worker task: [(secret_hash, secret_value)] -> [(secret_hash, result)]."""
+    return [(secret_hash, analyze_strength_raw(value)) for secret_hash, value in pairs]
+
+
+def analyze_strengths(pairs: dict, workers: int = 1, batch_size: int = DETECTION_BATCH_SIZE) -> dict:
+    """
+    Analyze {secret_hash: secret_value}, returning {secret_hash: result}.
+
+    Machine tokens are cheap and scored here; the rest go to zxcvbn, which
+    is CPU-bound and holds the GIL, so with workers > 1 they are split into
+    batches for a short-lived process pool. Only hashes and values cross
+    the process boundary, and batches are merged in submission order, so
+    the result is the same as the serial one.
+    """
+    results = {}
+    candidates = []
+    for secret_hash, value in pairs.items():
+        token = machine_token_strength(value) if value else None
+        if token:
+            results[secret_hash] = token
+        else:
+            candidates.append((secret_hash, value))
+            
+    if workers <= 1 or len(candidates) <= batch_size:
+        results.update(analyze_strength_batch(candidates))
+    else:
+        batches = [candidates[i:i + batch_size] for i in range(0, len(candidates), batch_size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+            for batch in pool.map(analyze_strength_batch, batches):
+                results.update(batch)
+    return {secret_hash: results[secret_hash] for secret_hash in pairs}
@@ -0,0 +1,196 @@
+# Origin URLs -> hosts, registrable domains ("sites") and the services behind them
+import ipaddress
+import os
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+PUBLIC_SUFFIX_FILE = os.path.join(os.path.dirname(__file__), "public_suffix_list.dat")
+
+# Importance tiers; scoring weighs findings for important sites higher
+IMPORTANT = "important"
+OTHER = "other"
+
+# Host or registrable domain -> (service name, tier). Looked up from the
+# most specific label suffix of a host down to its TLD, so aws.amazon.com
+# is AWS while www.amazon.com is Amazon, and a tier can sit on a TLD.
+# Registrable domains also match under country-code suffixes by their
+# label (see SERVICE_LABELS): google.de and amazon.co.uk need no entry.
+SERVICES = {
+    "google.com": ("Google", IMPORTANT),
+    "gmail.com": ("Google", IMPORTANT),
+    "youtube.com": ("Google", IMPORTANT),
+    "facebook.com": ("Facebook", IMPORTANT),
+    "instagram.com": ("Instagram", IMPORTANT),
+    "twitter.com": ("Twitter", IMPORTANT),
+    "x.com": ("Twitter", IMPORTANT),
+    "github.com": ("GitHub", IMPORTANT),
+    "gitlab.com": ("GitLab", IMPORTANT),
+    "aws.amazon.com": ("AWS", IMPORTANT),
+    "amazonaws.com": ("AWS", IMPORTANT),
+    "amazon.com": ("Amazon", IMPORTANT),
+    "azure.com": ("Azure", IMPORTANT),
+    "portal.azure.com": ("Azure", IMPORTANT),
+    "microsoft.com": ("Microsoft", IMPORTANT),
+    "microsoftonline.com": ("Microsoft", IMPORTANT),
+    "live.com": ("Microsoft", IMPORTANT),
+    "apple.com": ("Apple", IMPORTANT),
+    "icloud.com": ("Apple", IMPORTANT),
+    "paypal.com": ("PayPal", IMPORTANT),
+    "stripe.com": ("Stripe", IMPORTANT),
+    "chase.com": ("Chase", IMPORTANT),
+    "bankofamerica.com": ("Bank of America", IMPORTANT),
+    "usbank.com": ("U.S. Bank", IMPORTANT),
+    "wellsfargo.com": ("Wells Fargo", IMPORTANT),
+    "citi.com": ("Citi", IMPORTANT),
+    "hsbc.com": ("HSBC", IMPORTANT),
+    "barclays.co.uk": ("Barclays", IMPORTANT),
+    "slack.com": ("Slack", IMPORTANT),
+    "okta.com": ("Okta", IMPORTANT),
+    # Banks on the .bank TLD
+    "bank": (None, IMPORTANT),
+}
+
+DomainInfo = namedtuple("DomainInfo", ["host", "site", "service", "tier"])
+
+
+def load_public_suffixes(path: str = PUBLIC_SUFFIX_FILE) -> tuple:
+    """
+    (rules, wildcards, exceptions, private) from a public suffix list file.
+    
+    private holds the plain rules of the PRIVATE DOMAINS section: suffixes
+    run by hosting platforms rather than registries.
+    """
+    rules, wildcards, exceptions, private = set(), set(), set(), set()
+    in_private = False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            rule = line.strip().lower()
+            if rule.startswith("// ===begin private domains==="):
+                in_private = True
+            elif rule.startswith("// ===end private domains==="):
+                in_private = False
+            if not rule or rule.startswith("//"):
+                continue
+            if in_private and not rule.startswith(("!", "*.")):
+                private.add(rule)
+            if rule.startswith("!"):
+                exceptions.add(rule[1:])
+            elif rule.startswith("*."):
+                wildcards.add(rule[2:])
+            else:
+                rules.add(rule)
+    return rules, wildcards, exceptions, private
+
+
+_RULES, _WILDCARDS, _EXCEPTIONS, _PRIVATE = load_public_suffixes()
+# Listed registry suffixes under a two-letter country code (de, co.uk).
+# Unlisted TLDs are left out: the bundled list doesn't say what they are.
+_COUNTRY_SUFFIXES = {rule for rule in _RULES - _PRIVATE if len(rule.rsplit(".", 1)[-1]) == 2}
+
+
+def host_of(origin: str) -> str:
+    """Lowercased host of an origin URL or bare host name; "" when there is none."""
+    origin = (origin or "").strip().lower()
+    if not origin:
+        return ""
+    if "//" not in origin:
+        origin = "//" + origin
+    try:
+        host = urlsplit(origin).hostname or ""
+    except ValueError:
+        return ""
+    return host.rstrip(".")
+
+
+def public_suffix(host: str) -> str:
+    """The longest public suffix of a host, by the public suffix list rules."""
+    labels = host.split(".")
+    # The PSL default rule: an unlisted TLD is a public suffix on its own
+    suffix = labels[-1]
+    for i in range(len(labels) - 1, -1, -1):
+        candidate = ".".join(labels[i:])
+        if candidate in _EXCEPTIONS:
+            # An exception's parent is the suffix; the exception itself is registrable
+            return ".".join(labels[i + 1:])
+        if candidate in _RULES:
+            suffix = candidate
+        elif i > 0 and candidate in _WILDCARDS:
+            suffix = ".".join(labels[i - 1:])
+    return suffix
+
+
+def registrable_domain(host: str) -> str:
+    """The public suffix plus one label (mail.google.co.uk -> google.co.uk); the host itself for IPs and bare suffixes."""
+    if not host:
+        return ""
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return host
+    except ValueError:
+        pass
+    suffix = public_suffix(host)
+    if host == suffix:
+        return host
+    rest = host[:-len(suffix) - 1]
+    return rest.rsplit(".", 1)[-1] + "." + suffix
+
+
+def service_labels(services: dict = SERVICES) -> dict:
+    """
+    Registrable label -> (service name, tier) for the registrable domains
+    in services ("google" for google.com). Labels of one or two letters,
+    like x.com's, are too ambiguous to match under a country suffix.
+    """
+    labels = {}
+    for name, entry in services.items():
+        if registrable_domain(name) != name or public_suffix(name) == name:
+            continue
+        label = name.split(".", 1)[0]
+        if len(label) > 2:
+            labels.setdefault(label, entry)
+    return labels
+
+
+SERVICE_LABELS = service_labels()
+
+
+def lookup_service(host: str, site: str) -> tuple:
+    """
+    (service name, tier) of a host, or None.
+    
+    The host and its parent domains down to the site come first, then the
+    site's label under a country-code suffix, then the public suffixes.
+    Other suffixes don't get the label match: anyone can register
+    paypal.tk or chase.net, or host azure.github.io.
+    """
+    labels = host.split(".")
+    names = [".".join(labels[i:]) for i in range(len(labels))]
+    cut = names.index(site) + 1 if site in names else len(names)
+    for name in names[:cut]:
+        if name in SERVICES:
+            return SERVICES[name]
+    label, _, suffix = site.partition(".")
+    if suffix in _COUNTRY_SUFFIXES and label in SERVICE_LABELS:
+        return SERVICE_LABELS[label]
+    for name in names[cut:]:
+        if name in SERVICES:
+            return SERVICES[name]
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_domain(origin: str) -> DomainInfo:
+    """
+    Host, site, service and tier of an origin, memoized.
+
+    The same few hundred origins come up across every finding of a scan,
+    so each is parsed and looked up once.
+    """
+    host = host_of(origin)
+    site = registrable_domain(host)
+    service, tier = None, OTHER if host else None
+    entry = lookup_service(host, site) if host else None
+    if entry is not None:
+        service, tier = entry
+    return DomainInfo(host, site, service, tier)
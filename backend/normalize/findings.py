@@ -1,20 +1,73 @@
 import hashlib
 import json
+import sys
+from enum import IntFlag
+from backend.normalize.domains import parse_domain
+
+class IssueFlag(IntFlag):
+    """Issues found with a credential, as bits; stored and served by lowercase name."""
+    WEAK_PASSWORD = 1
+    SHORT_PASSWORD = 2
+    EXPOSED_IN_GIT_HISTORY = 4
+    COMMITTED_TO_GIT = 8
+    PLAINTEXT_FILE = 16
+    INSECURE_LOCATION = 32
+    REUSED_PASSWORD = 64
+    VARIANT_REUSE = 128
+
+    @classmethod
+    def from_names(cls, names) -> "IssueFlag":
+        """Combine flag names such as "weak_password"; unknown names are ignored."""
+        flags = cls(0)
+        for name in names:
+            flag = cls.__members__.get(name.upper())
+            if flag is not None:
+                flags |= flag
+        return flags
+
+    @property
+    def names(self) -> list:
+        return [flag.name.lower() for flag in IssueFlag if flag & self]
 
 class CredentialFinding:
-    def __init__(self, source_type, location, secret_hash, preview, username, domain, metadata, secret_value=None):
-        self.source_type = source_type
+    # Scans can hold hundreds of thousands of these: no per-instance __dict__
+    __slots__ = (
+        "source_type", "location", "secret_digest", "preview", "username", "domain",
+        "metadata", "flags", "risk_score", "score_mask", "ai_type", "ai_service_guess", "_secret_value"
+    )
+
+    def __init__(self, source_type, location, secret_digest, preview, username, domain, metadata, secret_value=None):
+        # Repeated in every finding, so share one copy of each
+        self.source_type = sys.intern(source_type)
         self.location = location
-        self.secret_hash = secret_hash
+        self.secret_digest = secret_digest
         self.preview = preview
         self.username = username
         self.domain = domain
         self.metadata = metadata
-        self.issue_flags = []
+        self.flags = IssueFlag(0)
         self.risk_score = 0
+        # Every input of risk_score, as bits (see detect/scoring.py)
+        self.score_mask = 0
+        self.ai_type = None
+        self.ai_service_guess = None
         # Transient field, do not persist to DB
         self._secret_value = secret_value
 
+    @property
+    def secret_hash(self) -> str:
+        """Hex SHA-256 of the secret, as stored in the DB and served by the API."""
+        return self.secret_digest.hex()
+
+    @property
+    def issue_flags(self) -> list:
+        """Flag names, as stored in the DB and served by the API."""
+        return self.flags.names
+
+    @issue_flags.setter
+    def issue_flags(self, names):
+        self.flags = IssueFlag.from_names(names)
+
 def normalize_raw_finding(raw: dict) -> CredentialFinding:
     """Convert raw collector output into normalized CredentialFinding."""
     secret_value = raw.get("secret_value", "")
@@ -22,7 +75,7 @@ def normalize_raw_finding(raw: dict) -> CredentialFinding:
     domain = raw.get("domain")
     
     # Compute Hash
-    secret_hash = hashlib.sha256(secret_value.encode('utf-8')).hexdigest()
+    secret_digest = hashlib.sha256(secret_value.encode('utf-8')).digest()
     
     # Create Preview (Masked)
     if len(secret_value) <= 4:
@@ -30,17 +83,22 @@ def normalize_raw_finding(raw: dict) -> CredentialFinding:
     else:
         preview = secret_value[:2] + "*" * (len(secret_value) - 4) + secret_value[-2:]
         
-    # Normalize domain if possible (simple strip for now)
+    # Origins are stored as their host (https://accounts.google.com/signin ->
+    # accounts.google.com); the full origin stays in metadata
     if domain:
-        domain = domain.lower().strip()
+        domain = parse_domain(domain).host or domain.lower().strip()
+        
+    metadata = raw.get("metadata", {})
+    if isinstance(metadata.get("pattern_name"), str):
+        metadata["pattern_name"] = sys.intern(metadata["pattern_name"])
         
     return CredentialFinding(
         source_type=raw["source_type"],
         location=raw["location"],
-        secret_hash=secret_hash,
+        secret_digest=secret_digest,
         preview=preview,
         username=username,
         domain=domain,
-        metadata=raw.get("metadata", {}),
+        metadata=metadata,
         secret_value=secret_value
     )
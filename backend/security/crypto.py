@@ -1,6 +1,7 @@
 import os
 import json
 import base64
+from functools import lru_cache
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 try:
     import win32crypt
@@ -49,12 +50,17 @@ def load_master_key() -> bytes:
             
         return key
 
+@lru_cache(maxsize=8)
+def get_cipher(master_key: bytes) -> AESGCM:
+    """Cached AES-GCM context for a master key; building one per call dominated bulk crypto."""
+    return AESGCM(master_key)
+
 def encrypt_value(master_key: bytes, plaintext: str) -> bytes:
     """AES-GCM encrypt."""
     if not plaintext:
         return b""
     
-    aesgcm = AESGCM(master_key)
+    aesgcm = get_cipher(master_key)
     nonce = os.urandom(12)
     data = plaintext.encode('utf-8')
     ciphertext = aesgcm.encrypt(nonce, data, None)
@@ -68,10 +74,24 @@ def decrypt_value(master_key: bytes, ciphertext: bytes) -> str:
         return ""
         
     try:
-        aesgcm = AESGCM(master_key)
+        aesgcm = get_cipher(master_key)
         nonce = ciphertext[:12]
         data = ciphertext[12:]
         plaintext = aesgcm.decrypt(nonce, data, None)
         return plaintext.decode('utf-8')
     except Exception:
         return "[DECRYPTION FAILED]"
+
+def decrypt_values(master_key: bytes, ciphertexts: list) -> list:
+    """AES-GCM decrypt many values with one cipher context; empty values map to None."""
+    aesgcm = get_cipher(master_key)
+    results = []
+    for ciphertext in ciphertexts:
+        if not ciphertext:
+            results.append(None)
+            continue
+        try:
+            results.append(aesgcm.decrypt(ciphertext[:12], ciphertext[12:], None).decode('utf-8'))
+        except Exception:
+            results.append("[DECRYPTION FAILED]")
+    return results
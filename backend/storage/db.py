@@ -1,176 +1,1009 @@
 import sqlite3
 import json
 import os
-from backend.security.crypto import encrypt_value, decrypt_value, load_master_key
+import threading
+from backend.security.crypto import encrypt_value, decrypt_value, decrypt_values, load_master_key
+from backend.normalize.domains import parse_domain
+
+
+def add_browser_sites(conn):
+    """
+    Give browser_password rows saved before locations carried the site
+    their site, so the next scan updates them instead of adding a copy.
+    
+    A row whose new key is already taken (a scan since the upgrade wrote
+    it) is a duplicate and is dropped.
+    """
+    rows = conn.execute(
+        "SELECT id, location_json, secret_hash, domain FROM findings WHERE source_type = 'browser_password'"
+    ).fetchall()
+    for row_id, location_json, secret_hash, domain in rows:
+        location = json.loads(location_json)
+        if "site" in location:
+            continue
+        location["site"] = parse_domain(domain or "").site
+        location_json = json.dumps(location)
+        taken = conn.execute(
+            "SELECT 1 FROM findings WHERE secret_hash = ? AND location_json = ?", (secret_hash, location_json)
+        ).fetchone()
+        if taken:
+            conn.execute("DELETE FROM findings WHERE id = ?", (row_id,))
+        else:
+            conn.execute("UPDATE findings SET location_json = ? WHERE id = ?", (location_json, row_id))
+
+# Schema migrations. Each entry is applied once, in order, and the database's
+# PRAGMA user_version records how many have run. Never edit a released entry;
+# append a new one instead. Migrations 1-3 predate versioning, so they use
+# IF NOT EXISTS: databases created before then replay them safely. An entry
+# is SQL or a function of the connection, for changes SQL can't express.
+MIGRATIONS = [
+    # 1: Base schema
+    [
+        """
+        CREATE TABLE IF NOT EXISTS findings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_type TEXT NOT NULL,
+            location_json TEXT NOT NULL,
+            secret_hash TEXT NOT NULL,
+            secret_preview_enc BLOB,
+            username_enc BLOB,
+            domain TEXT,
+            metadata_json TEXT,
+            issue_flags_json TEXT,
+            risk_score INTEGER DEFAULT 0,
+            ai_type TEXT,
+            ai_service_guess TEXT,
+            ai_explanation_enc BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS scans (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP,
+            status TEXT,
+            num_findings INTEGER DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """,
+    ],
+    # 2: File manifest for incremental filesystem scans
+    [
+        """
+        CREATE TABLE IF NOT EXISTS file_manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            inode INTEGER NOT NULL,
+            digest TEXT,
+            findings_enc BLOB,
+            scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ],
+    # 3: One row per secret per location; the conflict target of upsert_findings.
+    # Also serves lookups by secret_hash alone (leftmost column).
+    [
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_findings_hash_location ON findings (secret_hash, location_json)",
+    ],
+    # 4: Indexes for query_findings: the default listing order, filtered listings and domain lookups
+    [
+        "CREATE INDEX IF NOT EXISTS idx_findings_risk ON findings (risk_score DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_findings_source_risk ON findings (source_type, risk_score DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_findings_domain ON findings (domain)",
+    ],
+    # 5: Scan log totals and per-phase timings
+    [
+        "ALTER TABLE scans ADD COLUMN duration_seconds REAL",
+        "ALTER TABLE scans ADD COLUMN cpu_seconds REAL",
+        "ALTER TABLE scans ADD COLUMN peak_rss_bytes INTEGER",
+        "ALTER TABLE scans ADD COLUMN error TEXT",
+        """
+        CREATE TABLE scan_phases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            scan_id INTEGER NOT NULL REFERENCES scans (id) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            items INTEGER DEFAULT 0,
+            wall_seconds REAL,
+            cpu_seconds REAL,
+            peak_rss_bytes INTEGER,
+            details_json TEXT
+        )
+        """,
+        "CREATE INDEX idx_scan_phases_scan ON scan_phases (scan_id, seq)",
+    ],
+    # 6: Git history watermarks: ref tips and blobs already scanned, per repo
+    [
+        """
+        CREATE TABLE git_ref_tips (
+            repo TEXT NOT NULL,
+            ref TEXT NOT NULL,
+            tip TEXT NOT NULL,
+            PRIMARY KEY (repo, ref)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE git_scanned_blobs (
+            repo TEXT NOT NULL,
+            blob_id TEXT NOT NULL,
+            PRIMARY KEY (repo, blob_id)
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 7: Content-addressed scan results, shared by every copy of a file
+    [
+        """
+        CREATE TABLE content_cache (
+            digest TEXT NOT NULL,
+            version TEXT NOT NULL,
+            findings_enc BLOB,
+            size INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (digest, version)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX idx_content_cache_lru ON content_cache (last_used)",
+    ],
+    # 8: Password strength results, analyzed once per distinct secret
+    [
+        """
+        CREATE TABLE strength_cache (
+            secret_hash TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            result_enc BLOB NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 9: Reuse index: how many findings rows hold each secret, per source
+    # type, kept current by triggers; and how many other synced machines
+    # reported it, as of the last cloud sync
+    [
+        """
+        CREATE TABLE reuse_index (
+            secret_hash TEXT NOT NULL,
+            source_type TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (secret_hash, source_type)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT INTO reuse_index (secret_hash, source_type, count)
+        SELECT secret_hash, source_type, COUNT(*) FROM findings GROUP BY secret_hash, source_type
+        """,
+        """
+        CREATE TRIGGER findings_reuse_insert AFTER INSERT ON findings BEGIN
+            INSERT INTO reuse_index (secret_hash, source_type, count) VALUES (NEW.secret_hash, NEW.source_type, 1)
+            ON CONFLICT (secret_hash, source_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER findings_reuse_delete AFTER DELETE ON findings BEGIN
+            UPDATE reuse_index SET count = count - 1
+            WHERE secret_hash = OLD.secret_hash AND source_type = OLD.source_type;
+            DELETE FROM reuse_index
+            WHERE secret_hash = OLD.secret_hash AND source_type = OLD.source_type AND count <= 0;
+        END
+        """,
+        """
+        CREATE TRIGGER findings_reuse_update AFTER UPDATE OF secret_hash, source_type ON findings
+        WHEN OLD.secret_hash IS NOT NEW.secret_hash OR OLD.source_type IS NOT NEW.source_type BEGIN
+            UPDATE reuse_index SET count = count - 1
+            WHERE secret_hash = OLD.secret_hash AND source_type = OLD.source_type;
+            DELETE FROM reuse_index
+            WHERE secret_hash = OLD.secret_hash AND source_type = OLD.source_type AND count <= 0;
+            INSERT INTO reuse_index (secret_hash, source_type, count) VALUES (NEW.secret_hash, NEW.source_type, 1)
+            ON CONFLICT (secret_hash, source_type) DO UPDATE SET count = count + 1;
+        END
+        """,
+        """
+        CREATE TABLE remote_reuse (
+            secret_hash TEXT PRIMARY KEY,
+            machines INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 10: Variant reuse: an opaque id shared by findings whose secrets are
+    # near-duplicates of each other (see detect/similarity.py)
+    [
+        "ALTER TABLE findings ADD COLUMN variant_cluster TEXT",
+        "CREATE INDEX idx_findings_variant_cluster ON findings (variant_cluster) WHERE variant_cluster IS NOT NULL",
+    ],
+    # 11: Risk scores as weighted sums: each finding's score inputs as a
+    # bitmask, and the weight of each input (see detect/scoring.py).
+    # Existing rows get their mask on the next rescore_all_findings.
+    [
+        "ALTER TABLE findings ADD COLUMN score_mask INTEGER",
+        """
+        CREATE TABLE score_weights (
+            name TEXT PRIMARY KEY,
+            bit INTEGER NOT NULL,
+            weight INTEGER NOT NULL
+        )
+        """,
+    ],
+    # 12: The AWS and Slack patterns used to store only part of the token
+    # as the secret ("AKIA", the part after "xoxb-"). Drop those findings
+    # and everything that lets a scan skip files and history it has seen,
+    # so the next scan finds the whole tokens again.
+    [
+        """
+        DELETE FROM findings
+        WHERE json_extract(metadata_json, '$.pattern_name') IN ('AWS Access Key', 'Slack Token')
+        """,
+        "DELETE FROM file_manifest",
+        "DELETE FROM git_scanned_blobs",
+        "DELETE FROM git_ref_tips",
+    ],
+    # 13: Browser locations now include the site (see collectors/browsers.py).
+    # Rewrite older rows to match, then recount the reuse index so rows the
+    # upgrade duplicated are no longer counted twice.
+    [
+        add_browser_sites,
+        "DELETE FROM reuse_index",
+        """
+        INSERT INTO reuse_index (secret_hash, source_type, count)
+        SELECT secret_hash, source_type, COUNT(*) FROM findings GROUP BY secret_hash, source_type
+        """,
+    ],
+]
+
+# Keys of a phase record stored in their own scan_phases columns; the rest go to details_json
+PHASE_COLUMNS = ("name", "items", "wall_seconds", "cpu_seconds", "peak_rss_bytes")
+
+# API field name -> findings column, for projections in query_findings
+FINDING_COLUMNS = {
+    "id": "id",
+    "source_type": "source_type",
+    "location": "location_json",
+    "secret_hash": "secret_hash",
+    "preview": "secret_preview_enc",
+    "username": "username_enc",
+    "domain": "domain",
+    "metadata": "metadata_json",
+    "issue_flags": "issue_flags_json",
+    "risk_score": "risk_score",
+    "ai_type": "ai_type",
+    "ai_service_guess": "ai_service_guess",
+    "ai_explanation": "ai_explanation_enc",
+    "variant_cluster": "variant_cluster",
+    "created_at": "created_at",
+}
+
+# Fields stored encrypted. Listings leave them out unless asked for, so only
+# the rows a user actually opens pay for decryption.
+ENCRYPTED_FIELDS = ("preview", "username", "ai_explanation")
+LIST_FIELDS = [f for f in FINDING_COLUMNS if f not in ENCRYPTED_FIELDS]
 
 class Database:
+    """
+    Encrypted findings store.
+
+    Each thread gets its own SQLite connection: one connection shared by
+    the scan thread, git workers and API handlers would let readers see a
+    scan's uncommitted rows, and sqlite3 connections are not safe to use
+    from several threads at once.
+    """
+
     def __init__(self, path):
         self.path = path
-        self.conn = None
         self.master_key = None
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        """This thread's connection, opened on first use once the database is initialized."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None and self.master_key is not None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _connect(self):
+        # Writers from other threads wait for the lock instead of failing
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers (the API) proceed during a scan's bulk write,
+        # seeing only committed rows, and NORMAL sync is durable enough
+        # there: one fsync per checkpoint
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
 
     def init(self):
         """Initialize encrypted SQLite schema."""
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.path), exist_ok=True)
         
-        self.conn = sqlite3.connect(self.path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
         self.master_key = load_master_key()
+        self._local.conn = self._connect()
         
+        self.migrate()
+
+    def migrate(self):
+        """Apply pending schema migrations, tracked in PRAGMA user_version."""
+        current = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, statements in enumerate(MIGRATIONS[current:], start=current + 1):
+            with self.conn:
+                for sql in statements:
+                    if callable(sql):
+                        sql(self.conn)
+                    else:
+                        self.conn.execute(sql)
+                self.conn.execute(f"PRAGMA user_version = {version}")
+
+    def insert_finding(self, finding):
+        """Insert or update a finding."""
+        self.upsert_findings([finding])
+
+    def upsert_findings(self, findings) -> int:
+        """
+        Insert or update many findings in a single transaction.
+        
+        Rows are keyed by (secret_hash, location): a secret seen again at the
+        same place is updated in place, the same secret somewhere else gets
+        its own row. Returns the number of findings written.
+        """
+        if not self.conn:
+            self.init()
+            
+        count = 0
+        
+        def rows():
+            nonlocal count
+            for finding in findings:
+                count += 1
+                # Encrypt sensitive fields
+                preview_enc = encrypt_value(self.master_key, finding.preview)
+                username_enc = encrypt_value(self.master_key, finding.username) if finding.username else None
+                yield (
+                    finding.source_type,
+                    json.dumps(finding.location),
+                    finding.secret_hash,
+                    preview_enc,
+                    username_enc,
+                    finding.domain,
+                    json.dumps(finding.metadata),
+                    json.dumps(finding.issue_flags),
+                    finding.risk_score,
+                    finding.score_mask,
+                    getattr(finding, "ai_type", None),
+                    getattr(finding, "ai_service_guess", None)
+                )
+                
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO findings (
+                    source_type, location_json, secret_hash, secret_preview_enc,
+                    username_enc, domain, metadata_json, issue_flags_json, risk_score,
+                    score_mask, ai_type, ai_service_guess
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (secret_hash, location_json) DO UPDATE SET
+                    source_type = excluded.source_type,
+                    secret_preview_enc = excluded.secret_preview_enc,
+                    username_enc = excluded.username_enc,
+                    domain = excluded.domain,
+                    metadata_json = excluded.metadata_json,
+                    issue_flags_json = excluded.issue_flags_json,
+                    risk_score = excluded.risk_score,
+                    score_mask = excluded.score_mask,
+                    ai_type = excluded.ai_type,
+                    ai_service_guess = excluded.ai_service_guess,
+                    updated_at = CURRENT_TIMESTAMP
+            """, rows())
+            
+        return count
+
+    def _findings_from_rows(self, rows, fields) -> list:
+        """Decode findings rows (or projections of them) into their API shape."""
+        results = []
+        for row in rows:
+            result = {}
+            for field in fields:
+                value = row[FINDING_COLUMNS[field]]
+                if field in ('location', 'metadata'):
+                    value = json.loads(value) if value else {}
+                elif field == 'issue_flags':
+                    value = json.loads(value) if value else []
+                result[field] = value
+            results.append(result)
+            
+        # Encrypted columns are decrypted in bulk, one cipher context per call
+        for field in ENCRYPTED_FIELDS:
+            if field not in fields:
+                continue
+            values = decrypt_values(self.master_key, [row[FINDING_COLUMNS[field]] for row in rows])
+            for result, value in zip(results, values):
+                if value is None and field == 'preview':
+                    value = ""
+                result[field] = value
+                
+        return results
+
+    def get_all_findings(self, decrypt: bool = True) -> list:
+        """Retrieve all findings from storage; decrypt=False leaves out the encrypted fields."""
+        if not self.conn:
+            self.init()
+            
+        fields = list(FINDING_COLUMNS) if decrypt else LIST_FIELDS
         cursor = self.conn.cursor()
+        cursor.execute(f"SELECT {', '.join(FINDING_COLUMNS[f] for f in fields)} FROM findings ORDER BY risk_score DESC, id DESC")
+        return self._findings_from_rows(cursor.fetchall(), fields)
+
+    def get_finding(self, finding_id: int) -> dict:
+        """Retrieve and fully decrypt one finding, or None."""
+        if not self.conn:
+            self.init()
+            
+        row = self.conn.execute("SELECT * FROM findings WHERE id = ?", (finding_id,)).fetchone()
+        if row is None:
+            return None
+        return self._findings_from_rows([row], list(FINDING_COLUMNS))[0]
+
+    def query_findings(self, min_risk: int = None, source_type: str = None, domain: str = None,
+                       secret_hash: str = None, flags: list = None, after: tuple = None,
+                       limit: int = 100, fields: list = None, variant_cluster: str = None) -> dict:
+        """
+        Return one page of findings, highest risk first.
         
-        # Findings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS findings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_type TEXT NOT NULL,
-                location_json TEXT NOT NULL,
-                secret_hash TEXT NOT NULL,
-                secret_preview_enc BLOB,
-                username_enc BLOB,
-                domain TEXT,
-                metadata_json TEXT,
-                issue_flags_json TEXT,
-                risk_score INTEGER DEFAULT 0,
-                ai_type TEXT,
-                ai_service_guess TEXT,
-                ai_explanation_enc BLOB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        Filters are ANDed; `flags` requires every listed issue flag. Paging is
+        keyset-based: pass the previous page's `next_after` as `after`, which
+        stays cheap however deep the page since it seeks on the
+        (risk_score, id) index. `fields` limits the columns read and decoded;
+        by default the encrypted fields are left out and only decrypted when
+        requested explicitly.
         
-        # Scans table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS scans (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                finished_at TIMESTAMP,
-                status TEXT,
-                num_findings INTEGER DEFAULT 0
-            )
+        Returns {"items": [...], "next_after": (risk_score, id) or None}.
+        """
+        if not self.conn:
+            self.init()
+            
+        fields = list(fields) if fields else LIST_FIELDS
+        unknown = [f for f in fields if f not in FINDING_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown finding fields: {', '.join(unknown)}")
+        # id and risk_score are always read: they make up the page cursor
+        columns = {"id", "risk_score"} | {FINDING_COLUMNS[f] for f in fields}
+        
+        where = []
+        params = []
+        if min_risk is not None:
+            where.append("risk_score >= ?")
+            params.append(min_risk)
+        if source_type:
+            where.append("source_type = ?")
+            params.append(source_type)
+        if domain:
+            where.append("domain = ?")
+            params.append(domain)
+        if secret_hash:
+            where.append("secret_hash = ?")
+            params.append(secret_hash)
+        if variant_cluster:
+            where.append("variant_cluster = ?")
+            params.append(variant_cluster)
+        for flag in flags or []:
+            where.append("EXISTS (SELECT 1 FROM json_each(issue_flags_json) WHERE value = ?)")
+            params.append(flag)
+        if after:
+            where.append("(risk_score, id) < (?, ?)")
+            params.extend(after)
+            
+        sql = f"SELECT {', '.join(sorted(columns))} FROM findings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY risk_score DESC, id DESC LIMIT ?"
+        params.append(limit)
+        
+        rows = self.conn.execute(sql, params).fetchall()
+        items = self._findings_from_rows(rows, fields)
+        
+        next_after = (rows[-1]['risk_score'], rows[-1]['id']) if len(rows) == limit else None
+        return {"items": items, "next_after": next_after}
+
+    def iter_findings(self, after: tuple = None, batch_size: int = 500, **filters):
+        """Yield every finding matching query_findings filters, one page in memory at a time."""
+        while True:
+            page = self.query_findings(after=after, limit=batch_size, **filters)
+            yield from page["items"]
+            after = page["next_after"]
+            if after is None:
+                return
+
+    def get_reuse_groups(self) -> dict:
+        """Return mapping secret_hash -> list of finding ids, for secrets held by more than one row."""
+        if not self.conn:
+            self.init()
+            
+        rows = self.conn.execute("""
+            SELECT f.secret_hash, f.id FROM findings f
+            JOIN (
+                SELECT secret_hash FROM reuse_index GROUP BY secret_hash HAVING SUM(count) > 1
+            ) reused ON reused.secret_hash = f.secret_hash
+            ORDER BY f.id
         """)
+        groups = {}
+        for row in rows:
+            groups.setdefault(row['secret_hash'], []).append(row['id'])
+        return groups
+
+    def get_reuse_counts(self, hashes) -> dict:
+        """
+        secret_hash -> how many times it is held: findings rows here, plus
+        other machines that reported it at the last cloud sync. Hashes seen
+        nowhere are left out.
+        """
+        if not self.conn:
+            self.init()
+            
+        hashes = list(hashes)
+        counts = {}
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            marks = ','.join('?' * len(batch))
+            rows = self.conn.execute(f"""
+                SELECT secret_hash, SUM(count) AS count FROM reuse_index
+                WHERE secret_hash IN ({marks}) GROUP BY secret_hash
+                UNION ALL
+                SELECT secret_hash, machines FROM remote_reuse WHERE secret_hash IN ({marks})
+            """, batch + batch)
+            for row in rows:
+                counts[row['secret_hash']] = counts.get(row['secret_hash'], 0) + row['count']
+        return counts
+
+    def save_remote_reuse(self, machines: dict) -> list:
+        """
+        Record {secret_hash: other machines holding it}, as reported by the
+        cloud; 0 clears. Returns the hashes whose count changed.
+        """
+        if not self.conn:
+            self.init()
+            
+        hashes = list(machines)
+        stored = {}
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT secret_hash, machines FROM remote_reuse WHERE secret_hash IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            stored.update((row['secret_hash'], row['machines']) for row in rows)
+        changed = [h for h in hashes if (machines[h] or 0) != stored.get(h, 0)]
         
-        # Settings table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM remote_reuse WHERE secret_hash = ?",
+                [(h,) for h in changed if not machines[h]]
             )
-        """)
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO remote_reuse (secret_hash, machines) VALUES (?, ?)",
+                [(h, machines[h]) for h in changed if machines[h]]
+            )
+        return changed
+
+    def get_finding_keys(self, hashes) -> set:
+        """(secret_hash, location_json) of the stored rows holding these secrets."""
+        if not self.conn:
+            self.init()
+            
+        hashes = list(hashes)
+        keys = set()
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT secret_hash, location_json FROM findings WHERE secret_hash IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            keys.update((row['secret_hash'], row['location_json']) for row in rows)
+        return keys
+
+    def get_variant_rows(self, hashes) -> list:
+        """id, secret_hash, domain, score_mask, metadata_json, issue_flags_json and variant_cluster of the rows holding these secrets."""
+        if not self.conn:
+            self.init()
+            
+        hashes = list(hashes)
+        rows = []
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows.extend(self.conn.execute(
+                f"SELECT id, secret_hash, domain, score_mask, metadata_json, issue_flags_json, variant_cluster FROM findings WHERE secret_hash IN ({','.join('?' * len(batch))})",
+                batch
+            ))
+        return rows
+
+    def get_variant_hashes(self) -> set:
+        """Secret hashes of every row currently in a variant cluster."""
+        if not self.conn:
+            self.init()
+            
+        rows = self.conn.execute("SELECT DISTINCT secret_hash FROM findings WHERE variant_cluster IS NOT NULL")
+        return {row['secret_hash'] for row in rows}
+
+    def update_variant_rows(self, updates: list) -> int:
+        """Apply (risk_score, score_mask, issue_flags_json, variant_cluster, id) updates in one transaction."""
+        if not self.conn:
+            self.init()
+            
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE findings SET risk_score = ?, score_mask = ?, issue_flags_json = ?, variant_cluster = ? WHERE id = ?",
+                updates
+            )
+        return len(updates)
+
+    def get_reuse_rows(self, hashes) -> list:
+        """id, secret_hash, domain, score_mask, metadata_json and issue_flags_json of the rows holding these secrets."""
+        if not self.conn:
+            self.init()
+            
+        hashes = list(hashes)
+        rows = []
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows.extend(self.conn.execute(
+                f"SELECT id, secret_hash, domain, score_mask, metadata_json, issue_flags_json FROM findings WHERE secret_hash IN ({','.join('?' * len(batch))})",
+                batch
+            ))
+        return rows
+
+    def update_reuse_rows(self, updates: list) -> int:
+        """Apply (risk_score, score_mask, metadata_json, issue_flags_json, id) updates in one transaction."""
+        if not self.conn:
+            self.init()
+            
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE findings SET risk_score = ?, score_mask = ?, metadata_json = ?, issue_flags_json = ? WHERE id = ?",
+                updates
+            )
+        return len(updates)
+
+    def log_scan(self, started_at, finished_at, status: str, num_findings: int, phases: list, error: str = None) -> int:
+        """Record a scan and its phase timings; returns the scan id."""
+        if not self.conn:
+            self.init()
+            
+        peaks = [p["peak_rss_bytes"] for p in phases if p.get("peak_rss_bytes")]
+        with self.conn:
+            cursor = self.conn.execute("""
+                INSERT INTO scans (
+                    started_at, finished_at, status, num_findings,
+                    duration_seconds, cpu_seconds, peak_rss_bytes, error
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                started_at.isoformat(sep=' '),
+                finished_at.isoformat(sep=' '),
+                status,
+                num_findings,
+                (finished_at - started_at).total_seconds(),
+                sum(p.get("cpu_seconds") or 0 for p in phases),
+                max(peaks) if peaks else None,
+                error
+            ))
+            scan_id = cursor.lastrowid
+            self.conn.executemany("""
+                INSERT INTO scan_phases (
+                    scan_id, seq, name, items, wall_seconds, cpu_seconds, peak_rss_bytes, details_json
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    scan_id,
+                    seq,
+                    p["name"],
+                    p.get("items", 0),
+                    p.get("wall_seconds"),
+                    p.get("cpu_seconds"),
+                    p.get("peak_rss_bytes"),
+                    json.dumps({k: v for k, v in p.items() if k not in PHASE_COLUMNS})
+                )
+                for seq, p in enumerate(phases)
+            ])
+        return scan_id
+
+    def get_scans(self, limit: int = 20) -> list:
+        """Most recent scans first, without phases."""
+        if not self.conn:
+            self.init()
+            
+        rows = self.conn.execute("SELECT * FROM scans ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_scan(self, scan_id: int) -> dict:
+        """One scan with its phase breakdown, or None."""
+        if not self.conn:
+            self.init()
+            
+        row = self.conn.execute("SELECT * FROM scans WHERE id = ?", (scan_id,)).fetchone()
+        if row is None:
+            return None
+        scan = dict(row)
         
-        self.conn.commit()
+        scan["phases"] = []
+        for phase in self.conn.execute("SELECT * FROM scan_phases WHERE scan_id = ? ORDER BY seq", (scan_id,)):
+            record = {column: phase[column] for column in PHASE_COLUMNS}
+            record.update(json.loads(phase["details_json"] or "{}"))
+            scan["phases"].append(record)
+        return scan
 
-    def insert_finding(self, finding):
-        """Insert or update a finding."""
+    def compare_scans(self, base_id: int, other_id: int) -> dict:
+        """Phase-by-phase differences (other - base) between two scans, or None if either is missing."""
+        base, other = self.get_scan(base_id), self.get_scan(other_id)
+        if base is None or other is None:
+            return None
+            
+        base_phases = {p["name"]: p for p in base["phases"]}
+        other_phases = {p["name"]: p for p in other["phases"]}
+        names = list(base_phases) + [n for n in other_phases if n not in base_phases]
+        
+        phases = []
+        for name in names:
+            b, o = base_phases.get(name, {}), other_phases.get(name, {})
+            diff = {"name": name}
+            for key in ("wall_seconds", "cpu_seconds", "items"):
+                diff[f"base_{key}"] = b.get(key)
+                diff[f"other_{key}"] = o.get(key)
+                diff[f"delta_{key}"] = (o.get(key) or 0) - (b.get(key) or 0)
+            phases.append(diff)
+            
+        totals = {}
+        for key in ("duration_seconds", "cpu_seconds", "num_findings"):
+            totals[f"delta_{key}"] = (other[key] or 0) - (base[key] or 0)
+            
+        return {
+            "base": {k: v for k, v in base.items() if k != "phases"},
+            "other": {k: v for k, v in other.items() if k != "phases"},
+            "totals": totals,
+            "phases": phases
+        }
+
+    def get_manifest_entries(self, root: str) -> dict:
+        """Return mapping path -> manifest entry for files under root."""
         if not self.conn:
             self.init()
             
-        # Encrypt sensitive fields
-        preview_enc = encrypt_value(self.master_key, finding.preview)
-        username_enc = encrypt_value(self.master_key, finding.username) if finding.username else None
+        # Range scan on the primary key: every path that starts with root + separator
+        prefix = os.path.join(root, "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
         
-        # Check if hash exists to update or insert
         cursor = self.conn.cursor()
-        cursor.execute("SELECT id FROM findings WHERE secret_hash = ?", (finding.secret_hash,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            cursor.execute("""
-                UPDATE findings SET
-                    source_type = ?,
-                    location_json = ?,
-                    secret_preview_enc = ?,
-                    username_enc = ?,
-                    domain = ?,
-                    metadata_json = ?,
-                    issue_flags_json = ?,
-                    risk_score = ?,
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (
-                finding.source_type,
-                json.dumps(finding.location),
-                preview_enc,
-                username_enc,
-                finding.domain,
-                json.dumps(finding.metadata),
-                json.dumps(finding.issue_flags),
-                finding.risk_score,
-                existing['id']
-            ))
-        else:
-            cursor.execute("""
-                INSERT INTO findings (
-                    source_type, location_json, secret_hash, secret_preview_enc, 
-                    username_enc, domain, metadata_json, issue_flags_json, risk_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                finding.source_type,
-                json.dumps(finding.location),
-                finding.secret_hash,
-                preview_enc,
-                username_enc,
-                finding.domain,
-                json.dumps(finding.metadata),
-                json.dumps(finding.issue_flags),
-                finding.risk_score
+        cursor.execute(
+            "SELECT path, size, mtime_ns, inode, digest, findings_enc FROM file_manifest WHERE path >= ? AND path < ?",
+            (prefix, upper)
+        )
+        return {row['path']: dict(row) for row in cursor.fetchall()}
+
+    def decrypt_manifest_findings(self, entry: dict) -> list:
+        """Decrypt the raw findings stored with a manifest entry."""
+        if not entry.get('findings_enc'):
+            return []
+        return json.loads(decrypt_value(self.master_key, entry['findings_enc']))
+
+    def save_manifest_entries(self, records: list):
+        """Insert or replace manifest entries for scanned files."""
+        if not self.conn:
+            self.init()
+            
+        rows = []
+        for record in records:
+            # Raw findings carry secret values, so they are stored encrypted
+            findings_enc = encrypt_value(self.master_key, json.dumps(record["findings"])) if record["findings"] else None
+            rows.append((
+                record["path"],
+                record["size"],
+                record["mtime_ns"],
+                record["inode"],
+                record["digest"],
+                findings_enc
             ))
             
+        self.conn.executemany("""
+            INSERT OR REPLACE INTO file_manifest (path, size, mtime_ns, inode, digest, findings_enc)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
         self.conn.commit()
 
-    def get_all_findings(self) -> list:
-        """Retrieve all findings from storage."""
+    def delete_manifest_entries(self, paths: list):
+        """Forget files that no longer exist."""
         if not self.conn:
             self.init()
             
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM findings ORDER BY risk_score DESC")
-        rows = cursor.fetchall()
-        
-        results = []
-        for row in rows:
-            # Decrypt for display/processing
-            # Note: In a real app, we might only decrypt on demand
-            preview = decrypt_value(self.master_key, row['secret_preview_enc'])
-            username = decrypt_value(self.master_key, row['username_enc']) if row['username_enc'] else None
-            explanation = decrypt_value(self.master_key, row['ai_explanation_enc']) if row['ai_explanation_enc'] else None
-            
-            results.append({
-                "id": row['id'],
-                "source_type": row['source_type'],
-                "location": json.loads(row['location_json']),
-                "secret_hash": row['secret_hash'],
-                "preview": preview,
-                "username": username,
-                "domain": row['domain'],
-                "metadata": json.loads(row['metadata_json']),
-                "issue_flags": json.loads(row['issue_flags_json']) if row['issue_flags_json'] else [],
-                "risk_score": row['risk_score'],
-                "ai_type": row['ai_type'],
-                "ai_service_guess": row['ai_service_guess'],
-                "ai_explanation": explanation,
-                "created_at": row['created_at']
-            })
+        self.conn.executemany("DELETE FROM file_manifest WHERE path = ?", [(p,) for p in paths])
+        self.conn.commit()
+
+    def retire_file_findings(self, paths: list) -> set:
+        """Delete stored file and working-tree findings located in any of the given paths; returns their secret hashes."""
+        if not self.conn:
+            self.init()
+        if not paths:
+            return set()
+            
+        # One pass over the table rather than one per path
+        where = """
+            WHERE source_type IN ('file_secret', 'git_secret')
+            AND json_extract(location_json, '$.path') IN (SELECT value FROM json_each(?))
+        """
+        with self.conn:
+            hashes = {row[0] for row in self.conn.execute(f"SELECT DISTINCT secret_hash FROM findings {where}", (json.dumps(paths),))}
+            self.conn.execute(f"DELETE FROM findings {where}", (json.dumps(paths),))
+        return hashes
+
+    def get_git_tips(self, repo: str) -> dict:
+        """Return mapping ref -> commit id as of the last history scan of repo."""
+        if not self.conn:
+            self.init()
+            
+        rows = self.conn.execute("SELECT ref, tip FROM git_ref_tips WHERE repo = ?", (repo,))
+        return {row['ref']: row['tip'] for row in rows}
+
+    def get_git_scanned_blobs(self, repo: str) -> set:
+        """Blob ids already scanned in repo's history."""
+        if not self.conn:
+            self.init()
+            
+        rows = self.conn.execute("SELECT blob_id FROM git_scanned_blobs WHERE repo = ?", (repo,))
+        return {row['blob_id'] for row in rows}
+
+    def save_git_watermark(self, repo: str, tips: dict, blob_ids):
+        """Replace repo's ref tips and add newly scanned blob ids, in one transaction."""
+        if not self.conn:
+            self.init()
+            
+        with self.conn:
+            self.conn.execute("DELETE FROM git_ref_tips WHERE repo = ?", (repo,))
+            self.conn.executemany(
+                "INSERT INTO git_ref_tips (repo, ref, tip) VALUES (?, ?, ?)",
+                [(repo, ref, tip) for ref, tip in tips.items()]
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO git_scanned_blobs (repo, blob_id) VALUES (?, ?)",
+                [(repo, blob_id) for blob_id in blob_ids]
+            )
+
+    def get_content_cache_digests(self, version: str) -> list:
+        """Digests the result cache holds for a pattern-set version."""
+        if not self.conn:
+            self.init()
+            
+        rows = self.conn.execute("SELECT digest FROM content_cache WHERE version = ?", (version,))
+        return [row['digest'] for row in rows]
+
+    def get_content_cache_entry(self, version: str, digest: str):
+        """The cached entry for a digest as a row (findings_enc may be NULL: no findings), or None."""
+        if not self.conn:
+            self.init()
+            
+        return self.conn.execute(
+            "SELECT findings_enc FROM content_cache WHERE digest = ? AND version = ?",
+            (digest, version)
+        ).fetchone()
+
+    def save_content_cache(self, version: str, entries: list, touched, now: float):
+        """Add (digest, findings_enc) entries and mark touched digests as used, in one transaction."""
+        if not self.conn:
+            self.init()
+            
+        with self.conn:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO content_cache (digest, version, findings_enc, size, last_used)
+                VALUES (?, ?, ?, ?, ?)
+            """, [
+                (digest, version, findings_enc, len(digest) + len(findings_enc or b""), now)
+                for digest, findings_enc in entries
+            ])
+            self.conn.executemany(
+                "UPDATE content_cache SET last_used = ? WHERE digest = ? AND version = ?",
+                [(now, digest, version) for digest in touched]
+            )
+
+    def retire_content_cache(self, version: str):
+        """Drop cached results made with any other pattern set."""
+        if not self.conn:
+            self.init()
+            
+        with self.conn:
+            self.conn.execute("DELETE FROM content_cache WHERE version != ?", (version,))
+
+    def evict_content_cache(self, max_bytes: int) -> int:
+        """Drop least recently used entries until the cache fits max_bytes; returns how many went."""
+        if not self.conn:
+            self.init()
             
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM content_cache").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+            
+        victims = []
+        for row in self.conn.execute("SELECT digest, version, size FROM content_cache ORDER BY last_used"):
+            if total <= max_bytes:
+                break
+            victims.append((row['digest'], row['version']))
+            total -= row['size']
+            
+        with self.conn:
+            self.conn.executemany("DELETE FROM content_cache WHERE digest = ? AND version = ?", victims)
+        return len(victims)
+
+    def get_strength_results(self, version: str, hashes) -> dict:
+        """Decrypted strength results for the given secret hashes, made by this analysis version."""
+        if not self.conn:
+            self.init()
+            
+        hashes = list(hashes)
+        results = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT secret_hash, result_enc FROM strength_cache WHERE version = ? AND secret_hash IN ({','.join('?' * len(batch))})",
+                (version, *batch)
+            )
+            rows = rows.fetchall()
+            plaintexts = decrypt_values(self.master_key, [row['result_enc'] for row in rows])
+            for row, plaintext in zip(rows, plaintexts):
+                # An entry that no longer decrypts is simply analyzed again
+                if plaintext and plaintext != "[DECRYPTION FAILED]":
+                    results[row['secret_hash']] = json.loads(plaintext)
         return results
 
-    def get_reuse_groups(self) -> dict:
-        """Return mapping secret_hash -> list of findings."""
+    def save_strength_results(self, version: str, results: dict):
+        """Store {secret_hash: result} encrypted, dropping results from other analysis versions."""
         if not self.conn:
             self.init()
             
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT secret_hash, id FROM findings")
-        rows = cursor.fetchall()
+        with self.conn:
+            self.conn.execute("DELETE FROM strength_cache WHERE version != ?", (version,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO strength_cache (secret_hash, version, result_enc) VALUES (?, ?, ?)",
+                [
+                    (secret_hash, version, encrypt_value(self.master_key, json.dumps(result)))
+                    for secret_hash, result in results.items()
+                ]
+            )
+
+    def get_score_weights(self) -> dict:
+        """{feature name: weight} the stored risk scores were computed with."""
+        if not self.conn:
+            self.init()
+            
+        return {row['name']: row['weight'] for row in self.conn.execute("SELECT name, weight FROM score_weights")}
+
+    def get_unmasked_rows(self) -> list:
+        """id, domain, metadata_json and issue_flags_json of rows stored before score masks."""
+        if not self.conn:
+            self.init()
+            
+        return self.conn.execute(
+            "SELECT id, domain, metadata_json, issue_flags_json FROM findings WHERE score_mask IS NULL"
+        ).fetchall()
+
+    def rescore_findings(self, features: dict, weights: dict, masks: list = ()) -> int:
+        """
+        Store new score weights and recompute every risk score from them in one pass.
         
-        groups = {}
-        for row in rows:
-            h = row['secret_hash']
-            if h not in groups:
-                groups[h] = []
-            groups[h].append(row['id'])
+        features maps each feature name to its score-mask bit. masks are
+        (score_mask, id) pairs for rows that have none yet. Scores are summed
+        inside SQLite, so no row is decoded. Returns the number of rows rescored.
+        """
+        if not self.conn:
+            self.init()
             
-        # Filter for reuse > 1
-        return {k: v for k, v in groups.items() if len(v) > 1}
+        with self.conn:
+            self.conn.executemany("UPDATE findings SET score_mask = ? WHERE id = ?", masks)
+            self.conn.execute("DELETE FROM score_weights")
+            self.conn.executemany(
+                "INSERT INTO score_weights (name, bit, weight) VALUES (?, ?, ?)",
+                [(name, features[name], weight) for name, weight in weights.items()]
+            )
+            cursor = self.conn.execute("""
+                UPDATE findings SET risk_score = MAX(0, MIN(100, (
+                    SELECT COALESCE(SUM(weight), 0) FROM score_weights WHERE findings.score_mask & bit
+                ))) WHERE score_mask IS NOT NULL
+            """)
+        return cursor.rowcount
@@ -0,0 +1,48 @@
+import os
+
+
+class GitWatermark:
+    """
+    Per-scan view of how far one repo's history has been scanned.
+
+    Remembers the ref tips seen by the last history scan and every blob id
+    scanned so far, so the next scan only walks commits reachable from new
+    tips and never reads a blob twice.
+    """
+
+    def __init__(self, db, repo: str):
+        self.db = db
+        self.repo = os.path.abspath(repo)
+        self.tips = db.get_git_tips(self.repo)
+        self._scanned_blobs = None
+        self.new_blobs = set()
+        self.pending_tips = None
+
+    @property
+    def scanned_blobs(self) -> set:
+        # Loaded on first use: an untouched repo never needs it
+        if self._scanned_blobs is None:
+            self._scanned_blobs = self.db.get_git_scanned_blobs(self.repo)
+        return self._scanned_blobs
+
+    def scanned_before(self, blob_id: str) -> bool:
+        """Whether an earlier scan already matched this blob."""
+        return blob_id in self.scanned_blobs
+
+    def mark_scanned(self, blob_id: str):
+        self.new_blobs.add(blob_id)
+
+    def advance(self, tips: dict):
+        """Record the tips a finished walk covered; saved by commit()."""
+        self.pending_tips = tips
+
+    def commit(self):
+        """Persist the new tips and blobs, if the walk finished."""
+        if self.pending_tips is None:
+            return
+        self.db.save_git_watermark(self.repo, self.pending_tips, self.new_blobs)
+        self.tips = self.pending_tips
+        self.pending_tips = None
+        if self._scanned_blobs is not None:
+            self._scanned_blobs |= self.new_blobs
+        self.new_blobs = set()
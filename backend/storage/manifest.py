@@ -0,0 +1,76 @@
+import os
+
+
+class FileManifest:
+    """
+    Per-scan view of the persisted file manifest for one scan root.
+
+    The manifest remembers size, mtime_ns, inode and content digest of every
+    file seen under the root, along with the raw findings it produced, so an
+    incremental scan only reads files that actually changed.
+    """
+
+    def __init__(self, db, root: str):
+        self.db = db
+        self.root = root
+        self.entries = db.get_manifest_entries(root)
+        self.seen = set()
+        self.updated = []
+        self.changed = []
+        self.reused_count = 0
+        # Secret hashes of the stored findings retired so far
+        self.retired = set()
+
+    def check(self, path: str, dir_entry=None) -> tuple:
+        """
+        Return (findings, previous_digest) for a walked file.
+
+        findings is the earlier result if the file's stat fields are unchanged,
+        else None and the file has to be looked at again. Pass the walker's
+        DirEntry to reuse its stat result.
+        """
+        self.seen.add(path)
+        entry = self.entries.get(path)
+        if entry is None:
+            return None, None
+
+        try:
+            st = dir_entry.stat() if dir_entry is not None else os.stat(path)
+        except OSError:
+            return None, entry["digest"]
+
+        if (st.st_size, st.st_mtime_ns, st.st_ino) == (entry["size"], entry["mtime_ns"], entry["inode"]):
+            self.reused_count += 1
+            return self.db.decrypt_manifest_findings(entry), entry["digest"]
+        return None, entry["digest"]
+
+    def update(self, record: dict) -> list:
+        """Record a freshly scanned file and return its findings."""
+        path = record["path"]
+        self.seen.add(path)
+        entry = self.entries.get(path)
+
+        if record["findings"] is None:
+            # Touched but identical content: keep the earlier findings
+            record["findings"] = self.db.decrypt_manifest_findings(entry) if entry else []
+            self.reused_count += 1
+        elif entry is not None:
+            self.changed.append(path)
+
+        self.updated.append(record)
+        return record["findings"]
+
+    def retire_changed(self):
+        """Retire the stored findings of files changed so far, before their new findings are written."""
+        # Git workers may still be adding to the list: take it, then retire
+        changed, self.changed = self.changed, []
+        self.retired |= self.db.retire_file_findings(changed)
+
+    def commit(self):
+        """Persist updated entries, drop deleted files and retire stale findings."""
+        deleted = [path for path in self.entries if path not in self.seen]
+        self.db.delete_manifest_entries(deleted)
+        self.retired |= self.db.retire_file_findings(deleted + self.changed)
+        self.db.save_manifest_entries(self.updated)
+        self.updated = []
+        self.changed = []
@@ -0,0 +1,64 @@
+import json
+import time
+from backend.collectors.filesystem import digest_key, rebase_findings
+from backend.security.crypto import encrypt_value, decrypt_value
+
+
+class ResultCache:
+    """
+    Content-addressed file scan results, persisted across scans.
+
+    Entries are keyed by content digest plus the pattern-set version, so the
+    same bytes found at another path (a copied .env template, a vendored
+    config, a second checkout) are not matched again. Opening the cache with
+    a new version drops every older entry: results can't outlive the
+    patterns that produced them. The table is kept under max_bytes by
+    evicting the least recently used entries on commit.
+    """
+
+    def __init__(self, db, version: str, max_bytes: int):
+        self.db = db
+        self.version = version
+        self.max_bytes = max_bytes
+        db.retire_content_cache(version)
+        self.keys = {digest_key(d) for d in db.get_content_cache_digests(version)}
+        self.added = {}
+        self.touched = set()
+        self.hits = 0
+
+    def snapshot(self) -> frozenset:
+        """Digest keys as of now, for pool workers."""
+        return frozenset(self.keys)
+
+    def get(self, digest: str, path: str) -> list:
+        """Findings for content with this digest, rebased onto path; None on a miss."""
+        if digest in self.added:
+            findings = self.added[digest]
+        else:
+            row = self.db.get_content_cache_entry(self.version, digest)
+            if row is None:
+                return None
+            enc = row['findings_enc']
+            findings = json.loads(decrypt_value(self.db.master_key, enc)) if enc else []
+            self.touched.add(digest)
+        self.hits += 1
+        return rebase_findings(findings, path)
+
+    def put(self, digest: str, findings: list):
+        """Remember a freshly scanned file's findings under its digest."""
+        if digest in self.added:
+            return
+        self.added[digest] = rebase_findings(findings, None)
+        self.keys.add(digest_key(digest))
+
+    def commit(self):
+        """Persist new entries and usage, then evict down to max_bytes."""
+        # Findings carry secret values, so they are stored encrypted
+        entries = [
+            (digest, encrypt_value(self.db.master_key, json.dumps(findings)) if findings else None)
+            for digest, findings in self.added.items()
+        ]
+        self.db.save_content_cache(self.version, entries, self.touched, time.time())
+        self.db.evict_content_cache(self.max_bytes)
+        self.added = {}
+        self.touched = set()
@@ -0,0 +1,52 @@
+from backend.detect.strength import STRENGTH_VERSION, analyze_strength_raw, analyze_strengths
+
+
+class StrengthCache:
+    """
+    Password strength results keyed by secret hash, persisted across scans.
+
+    zxcvbn costs milliseconds per call, and the same password or token turns
+    up in many places and in every scan. Results are looked up in one batch
+    per scan, computed only for secrets never seen before, and stored
+    encrypted alongside the findings. A new STRENGTH_VERSION starts over.
+    """
+
+    def __init__(self, db, version: str = STRENGTH_VERSION):
+        self.db = db
+        self.version = version
+        self.results = {}
+        self.added = {}
+        # Distinct secrets whose result was already stored
+        self.hits = 0
+
+    def load(self, hashes):
+        """Fetch stored results for the hashes not already in memory."""
+        missing = {h for h in hashes if h not in self.results}
+        if missing:
+            self.results.update(self.db.get_strength_results(self.version, missing))
+
+    def analyze_all(self, pairs: dict, workers: int = 1):
+        """Make sure every {secret_hash: secret_value} has a result, analyzing the new ones in parallel."""
+        try:
+            self.load(pairs)
+        except Exception as e:
+            print(f"Could not load strength cache: {e}")
+        new = {h: value for h, value in pairs.items() if h not in self.results}
+        self.hits += len(pairs) - len(new)
+        results = analyze_strengths(new, workers=workers)
+        self.results.update(results)
+        self.added.update(results)
+
+    def analyze(self, secret_hash: str, secret_value: str) -> dict:
+        """Strength result for a secret, computed at most once per hash."""
+        result = self.results.get(secret_hash)
+        if result is not None:
+            return result
+        result = analyze_strength_raw(secret_value)
+        self.results[secret_hash] = self.added[secret_hash] = result
+        return result
+
+    def commit(self):
+        """Persist results computed since the last commit."""
+        self.db.save_strength_results(self.version, self.added)
+        self.added = {}
@@ -1,4 +1,5 @@
 # Utils for file type detection
+import os
 
 def is_text_file(path: str) -> bool:
     """Check if file is text."""
@@ -0,0 +1,110 @@
+# Utils for measuring scan phases
+import os
+import sys
+import threading
+import time
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def cpu_seconds() -> float:
+    """CPU time of this process, plus any reaped child processes (pool workers) where the OS reports it."""
+    total = time.process_time()
+    if resource:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        total += children.ru_utime + children.ru_stime
+    return total
+
+def _windows_memory_counters():
+    """PROCESS_MEMORY_COUNTERS of this process, or None."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters
+    except Exception:
+        pass
+    return None
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process right now, or None where the OS doesn't report it cheaply (macOS)."""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+            
+    if sys.platform == "win32":
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize if counters else None
+        
+    return None
+
+class RssPeak:
+    """
+    Highest RSS of this process between creation and stop().
+    
+    The process's own high-water mark (ru_maxrss) never goes down, so in a
+    long-lived server every phase after the heaviest would report the same
+    number. Instead current RSS is sampled every SAMPLE_INTERVAL seconds by
+    one background thread shared by all open RssPeaks, which exits once none
+    are left. Spikes shorter than the interval can be missed.
+    """
+    SAMPLE_INTERVAL = 0.02
+
+    _lock = threading.Lock()
+    _open = set()
+    _sampler = None
+
+    def __init__(self):
+        self.peak = None
+        self.sample(current_rss_bytes())
+        cls = type(self)
+        with cls._lock:
+            cls._open.add(self)
+            if cls._sampler is None:
+                cls._sampler = threading.Thread(target=cls._run, name="rss-sampler", daemon=True)
+                cls._sampler.start()
+
+    def sample(self, rss: int):
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def stop(self) -> int:
+        """Stop sampling; returns the peak in bytes, or None if RSS is unavailable."""
+        with self._lock:
+            self._open.discard(self)
+        self.sample(current_rss_bytes())
+        return self.peak
+
+    @classmethod
+    def _run(cls):
+        while True:
+            time.sleep(cls.SAMPLE_INTERVAL)
+            rss = current_rss_bytes()
+            with cls._lock:
+                if not cls._open:
+                    cls._sampler = None
+                    return
+                for peak in cls._open:
+                    peak.sample(rss)
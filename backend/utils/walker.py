@@ -0,0 +1,108 @@
+# Shared directory walker for the filesystem and git collectors
+import os
+import time
+from fnmatch import fnmatch
+
+# Skip common ignore dirs
+IGNORE_DIRS = {'.git', 'node_modules', 'venv', '__pycache__', '.idea', '.vscode', 'dist', 'build'}
+
+
+def is_excluded(path: str, name: str, exclude_globs) -> bool:
+    """Whether a path matches any exclude glob, by name or by full path."""
+    if not exclude_globs:
+        return False
+    slashed = path.replace(os.sep, "/")
+    return any(fnmatch(name, glob) or fnmatch(slashed, glob) for glob in exclude_globs)
+
+
+def walk(root: str, ignore_dirs=IGNORE_DIRS, exclude_globs=(), repo_files: bool = True, stats: dict = None,
+         repo_ignored_dirs=None):
+    """
+    Walk root once with os.scandir, yielding ("file", path, entry) and ("repo", path, entry).
+
+    Order matches a top-down os.walk: a directory's files, then its
+    subdirectories depth first. Directories named in ignore_dirs and paths
+    matching exclude_globs are pruned. A directory holding a .git entry is
+    reported as a repo root before its files; with repo_files=False the
+    files under a repo root are left out (its git scan covers them), but its
+    subdirectories are still walked to find nested repos.
+
+    repo_ignored_dirs, if given, is called once with each repo root and
+    returns directories under it to prune too: the repo's git-ignored ones
+    (see git_scanner.git_ignored_dirs), so target/ or .venv/ isn't entered.
+
+    The DirEntry is yielded along with the path: its type, and on Windows its
+    stat result, come from the directory listing at no extra cost.
+    Pass a dict as stats to get entries, dirs, files, repos and entries/sec.
+    """
+    counts = {"entries": 0, "dirs": 0, "files": 0, "repos": 0}
+    start = time.perf_counter()
+    # (directory path, whether it is inside a repo)
+    stack = [(root, False)]
+    pruned = set()
+    try:
+        while stack:
+            path, in_repo = stack.pop()
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            counts["dirs"] += 1
+            counts["entries"] += len(entries)
+
+            if any(entry.name == '.git' for entry in entries):
+                in_repo = True
+                counts["repos"] += 1
+                yield "repo", path, None
+                if repo_ignored_dirs is not None:
+                    pruned.update(repo_ignored_dirs(path))
+
+            subdirs = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                    # Like os.walk, symlinked directories are listed but not followed
+                    follow = is_dir and not entry.is_symlink()
+                except OSError:
+                    continue
+                if is_dir:
+                    if (follow and entry.name not in ignore_dirs and entry.path not in pruned
+                            and not is_excluded(entry.path, entry.name, exclude_globs)):
+                        subdirs.append(entry.path)
+                    continue
+                if in_repo and not repo_files:
+                    continue
+                if is_excluded(entry.path, entry.name, exclude_globs):
+                    continue
+                counts["files"] += 1
+                yield "file", entry.path, entry
+
+            stack.extend((subdir, in_repo) for subdir in reversed(subdirs))
+    finally:
+        if stats is not None:
+            elapsed = time.perf_counter() - start
+            stats.update(counts)
+            stats["seconds"] = round(elapsed, 6)
+            stats["entries_per_second"] = round(counts["entries"] / elapsed, 1) if elapsed else 0.0
+
+
+def walk_repo_files(root: str, ignore_dirs=IGNORE_DIRS, exclude_globs=(), stats: dict = None):
+    """Yield (path, entry) for the files of the repo at root, leaving out repos nested in it (their own scans cover them)."""
+    nested = []
+    for kind, path, entry in walk(root, ignore_dirs, exclude_globs, True, stats):
+        if kind == "repo":
+            if path != root:
+                nested.append(os.path.join(path, ""))
+        elif not nested or not any(path.startswith(prefix) for prefix in nested):
+            yield path, entry
+
+
+def walk_files(root: str, ignore_dirs=IGNORE_DIRS, exclude_globs=(), repo_files: bool = True, repos: list = None, stats: dict = None,
+               repo_ignored_dirs=None):
+    """Yield (path, entry) for the files of walk(); repo roots found on the way are appended to repos if given."""
+    for kind, path, entry in walk(root, ignore_dirs, exclude_globs, repo_files, stats, repo_ignored_dirs):
+        if kind == "file":
+            yield path, entry
+        elif repos is not None:
+            repos.append(path)
@@ -0,0 +1,88 @@
+"""
+Benchmark: memory per CredentialFinding vs. the original dict-backed class.
+
+    python benchmarks/bench_findings_memory.py [--findings N]
+"""
+import argparse
+import gc
+import hashlib
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.normalize.findings import IssueFlag, normalize_raw_finding
+
+
+class LegacyCredentialFinding:
+    """The pre-slots class, kept for comparison."""
+
+    def __init__(self, source_type, location, secret_hash, preview, username, domain, metadata, secret_value=None):
+        self.source_type = source_type
+        self.location = location
+        self.secret_hash = secret_hash
+        self.preview = preview
+        self.username = username
+        self.domain = domain
+        self.metadata = metadata
+        self.issue_flags = []
+        self.risk_score = 0
+        self._secret_value = secret_value
+
+
+def raw_finding(i: int) -> dict:
+    """A filesystem finding as the collector emits it; strings are built per finding, as parsing does."""
+    return {
+        "source_type": "".join(["file_", "secret"]),
+        "location": {"path": f"/home/user/projects/app{i % 50}/config/settings{i}.env", "line": i % 300},
+        "secret_value": f"token_{i:08d}_abcdefghijklmnop",
+        "metadata": {"pattern_name": "".join(["Generic ", "Secret"]), "context": f"api_token = token_{i:08d}"}
+    }
+
+
+def legacy_finding(raw: dict) -> LegacyCredentialFinding:
+    secret = raw["secret_value"]
+    f = LegacyCredentialFinding(
+        raw["source_type"], raw["location"], hashlib.sha256(secret.encode()).hexdigest(),
+        secret[:2] + "*" * (len(secret) - 4) + secret[-2:], None, None, raw["metadata"]
+    )
+    f.issue_flags.extend(["".join(["plaintext_", "file"]), "".join(["reused_", "password"])])
+    return f
+
+
+def current_finding(raw: dict):
+    f = normalize_raw_finding(raw)
+    f._secret_value = None
+    f.flags |= IssueFlag.PLAINTEXT_FILE | IssueFlag.REUSED_PASSWORD
+    return f
+
+
+def bytes_per_finding(make, count: int) -> float:
+    raws = [raw_finding(i) for i in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    findings = [make(raw) for raw in raws]
+    del raws
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(findings) == count
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--findings", type=int, default=100000)
+    args = parser.parse_args()
+
+    legacy = bytes_per_finding(legacy_finding, args.findings)
+    current = bytes_per_finding(current_finding, args.findings)
+    print(f"{args.findings} findings")
+    print(f"legacy : {legacy:8.0f} bytes/finding")
+    print(f"compact: {current:8.0f} bytes/finding  ({1 - current / legacy:.0%} smaller)")
+
+
+if __name__ == "__main__":
+    main()
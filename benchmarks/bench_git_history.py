@@ -0,0 +1,102 @@
+"""
+Benchmark: scan_git_history vs. the original `git log -p` line scanner.
+
+    python benchmarks/bench_git_history.py [--commits N] [--files N] [--lines N] [--branches N]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.collectors.filesystem import PATTERNS
+from backend.collectors.git_scanner import scan_git_history
+from benchmarks.bench_matcher import make_corpus
+
+
+def legacy_scan_git_history(repo_path: str, max_commits: int = 500) -> list:
+    """The pre-batch implementation (path parsing aside), kept for comparison."""
+    findings = []
+    process = subprocess.Popen(
+        ['git', 'log', '-p', f'-n {max_commits}'],
+        cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors='ignore'
+    )
+    current_commit = None
+    current_file = None
+    for line in process.stdout:
+        line = line.rstrip()
+        if line.startswith('commit '):
+            current_commit = line.split(' ')[1]
+            continue
+        if line.startswith('diff --git'):
+            current_file = line.split(' ')[-1][2:]
+            continue
+        if line.startswith('+') and not line.startswith('+++'):
+            content = line[1:]
+            for pattern in PATTERNS:
+                match = pattern["regex"].search(content)
+                if match:
+                    secret_value = match.group(match.lastindex) if match.lastindex else match.group(0)
+                    findings.append((current_commit, current_file, pattern["name"], secret_value))
+    process.wait()
+    return findings
+
+
+def make_repo(root: str, commits: int, files: int, lines: int, branches: int, seed: int = 11) -> str:
+    """Build a repo whose commits each rewrite a few files of a planted corpus."""
+    rng = random.Random(seed)
+    repo = os.path.join(root, "repo")
+    os.makedirs(repo)
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@example.com",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@example.com")
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=repo, env=env, check=True, capture_output=True)
+
+    git("init", "-q")
+    paths = make_corpus(repo, files, lines, hit_every=50, seed=seed)
+    git("add", ".")
+    git("commit", "-qm", "initial")
+
+    for i in range(1, commits):
+        if branches > 1 and i % (commits // branches or 1) == 0:
+            git("checkout", "-q", "-b", f"branch{i}")
+        for path in rng.sample(paths, min(3, len(paths))):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(f"\nvalue_{i} = compute({i})")
+        git("commit", "-qam", f"change {i}")
+    return repo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commits", type=int, default=200)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--branches", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        repo = make_repo(root, args.commits, args.files, args.lines, args.branches)
+
+        start = time.perf_counter()
+        legacy = legacy_scan_git_history(repo, max_commits=args.commits)
+        legacy_s = time.perf_counter() - start
+
+        stats = {}
+        start = time.perf_counter()
+        current = scan_git_history(repo, stats=stats)
+        current_s = time.perf_counter() - start
+
+    size_mb = stats["bytes"] / (1024 * 1024)
+    print(f"repo: {stats['commits']} commits, {stats['blobs']} distinct blobs, {size_mb:.1f} MB of blob content")
+    print(f"legacy : {legacy_s:8.3f}s  {len(legacy):6d} added-line hits")
+    print(f"batched: {current_s:8.3f}s  {len(current):6d} findings  {size_mb / current_s:8.1f} MB/s  ({legacy_s / current_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: VariantIndex clustering vs. pairwise comparison of secrets.
+
+    python benchmarks/bench_variants.py [--secrets N ...] [--pairwise N]
+"""
+import argparse
+import hashlib
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.detect.similarity import VariantIndex, MIN_SIMILARITY, shingles, skeleton
+
+SYLLABLES = ["sun", "mer", "dog", "cat", "rex", "star", "moon", "ka", "zu", "ri", "lo", "ven", "tor", "bel", "fin", "gar"]
+
+
+def make_secrets(count: int, variant_every: int = 10, seed: int = 5) -> tuple:
+    """Human-style passwords; every variant_every-th one is a variant of an earlier one. Returns (secrets, planted pairs)."""
+    rng = random.Random(seed)
+    secrets, planted = [], []
+    while len(secrets) < count:
+        if secrets and len(secrets) % variant_every == 0:
+            base = rng.choice(secrets)
+            variant = base.rstrip(string.digits + "!#") + str(rng.randint(0, 99)) + rng.choice(["", "!", "#"])
+            if variant != base:
+                planted.append((base, variant))
+                secrets.append(variant)
+            continue
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5))).capitalize()
+        secrets.append(word + str(rng.randint(0, 9999)) + rng.choice(["", "!", "?"]))
+    return secrets, planted
+
+
+def pairwise_clusters(secrets: list) -> int:
+    """The naive approach: compare every pair; returns how many pairs match."""
+    skels = [skeleton(s) for s in secrets]
+    grams = [shingles(s) for s in secrets]
+    matches = 0
+    for i in range(len(secrets)):
+        for j in range(i + 1, len(secrets)):
+            union = len(grams[i] | grams[j])
+            if skels[i] == skels[j] or (union and len(grams[i] & grams[j]) / union >= MIN_SIMILARITY):
+                matches += 1
+    return matches
+
+
+def run(count: int):
+    secrets, planted = make_secrets(count)
+    hashes = {s: hashlib.sha256(s.encode()).hexdigest() for s in secrets}
+    index = VariantIndex(os.urandom(32))
+    start = time.perf_counter()
+    for s in secrets:
+        index.add(hashes[s], s)
+    clusters = index.clusters()
+    elapsed = time.perf_counter() - start
+    found = sum(1 for a, b in planted if clusters.get(hashes[a]) and clusters.get(hashes[a]) == clusters.get(hashes[b]))
+    print(f"{count:7d} secrets: {elapsed:7.2f}s  {count / elapsed:9.0f} secrets/s  "
+          f"{len(set(clusters.values())):6d} clusters  planted variants found {found}/{len(planted)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--secrets", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--pairwise", type=int, default=2000, help="size for the O(n^2) comparison; 0 skips it")
+    args = parser.parse_args()
+
+    for count in args.secrets:
+        run(count)
+
+    if args.pairwise:
+        secrets, _ = make_secrets(args.pairwise)
+        start = time.perf_counter()
+        matches = pairwise_clusters(secrets)
+        elapsed = time.perf_counter() - start
+        print(f"pairwise at {args.pairwise}: {elapsed:.2f}s ({matches} matching pairs); "
+              f"extrapolated to {max(args.secrets)}: {elapsed * (max(args.secrets) / args.pairwise) ** 2:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
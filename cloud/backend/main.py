@@ -21,6 +21,8 @@ class AgentHeartbeat(BaseModel):
 # --- In-Memory Store (Replace with Postgres) ---
 findings_db = []
 agents_db = {}
+# secret_hash -> agent ids that reported it
+reuse_index = {}
 
 @app.get("/")
 def health():
@@ -38,13 +40,20 @@ def heartbeat(data: AgentHeartbeat):
 
 @app.post("/api/v1/findings/sync")
 def sync_findings(findings: List[FindingCreate]):
-    """Receive encrypted findings from agents."""
+    """
+    Receive encrypted findings from agents.
+    
+    Replies with how many other agents hold each synced secret, so agents
+    count reuse across machines.
+    """
     # In a real app, verify JWT token here
     count = 0
     for f in findings:
         findings_db.append(f.dict())
+        reuse_index.setdefault(f.secret_hash, set()).add(f.agent_id)
         count += 1
-    return {"synced": count}
+    reuse = {f.secret_hash: len(reuse_index[f.secret_hash] - {f.agent_id}) for f in findings}
+    return {"synced": count, "reuse": reuse}
 
 @app.get("/api/v1/dashboard/summary")
 def get_dashboard_summary():
@@ -1,3 +1,22 @@
 def test_classification_redaction():
     """Ensure no full secrets are ever sent to AI layer."""
     pass
+
+
+def test_rule_classifier_covers_every_kind_of_evidence():
+    """Prefixes, formats, pattern names, file names and origins each classify a finding."""
+    from backend.ai.classify import CLASSIFIER, RuleClassifier, classify_secret
+
+    assert CLASSIFIER.classify("ghp_0123456789abcdef") == ("api_key", "GitHub")
+    # The longest prefix wins
+    assert CLASSIFIER.classify("sk-ant-api03-abcdef") == ("api_key", "Anthropic")
+    assert CLASSIFIER.classify("postgresql://app:pw@db/prod") == ("db_connection", "PostgreSQL")
+    assert CLASSIFIER.classify(path="/home/me/.aws/credentials") == ("api_key", "AWS")
+    assert CLASSIFIER.classify(path="/home/me/notes/credentials") == ("unknown", "Unknown")
+    assert CLASSIFIER.classify(path="C:\\Users\\me\\.ssh\\id_ed25519") == ("ssh_key", "SSH")
+    assert classify_secret({"pattern_name": "Slack Token"}) == {"type": "api_key", "service_guess": "Slack"}
+    assert classify_secret({"origin": "https://accounts.google.com/"}) == {"type": "password", "service_guess": "Google"}
+
+    custom = RuleClassifier([{"type": "api_key", "service": "Internal", "prefixes": ["acme_"]}])
+    assert custom.classify("acme_123") == ("api_key", "Internal")
+    assert custom.classify("acm") == ("unknown", "Unknown")
@@ -0,0 +1,38 @@
+import asyncio
+import json
+from fastapi import FastAPI
+from backend.api.routes_findings import register_findings_routes, decode_cursor
+from tests.test_storage import make_db, make_finding
+
+
+def endpoint(app, path):
+    return next(route.endpoint for route in app.routes if route.path == path)
+
+
+def test_findings_cursor_pagination_and_ndjson(tmp_path, monkeypatch):
+    """Cursor pages and the NDJSON stream cover the same findings."""
+    db = make_db(tmp_path, monkeypatch)
+    db.upsert_findings([make_finding(f"secret-{i:02d}-value", f"/f{i}", risk=i * 5) for i in range(12)])
+    app = FastAPI()
+    register_findings_routes(app, db)
+    list_findings = endpoint(app, "/findings")
+    params = dict(min_risk=None, source_type=None, domain=None, flags=None)
+
+    ids = []
+    cursor = None
+    while True:
+        page = list_findings(limit=5, cursor=cursor, fields="id,risk_score", format="json", **params)
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    response = list_findings(limit=5, cursor=None, fields="id", format="ndjson", **params)
+
+    async def consume():
+        return [chunk async for chunk in response.body_iterator]
+
+    streamed = [json.loads(line)["id"] for line in asyncio.run(consume())]
+    assert len(ids) == 12
+    assert streamed == ids
+    assert decode_cursor(None) is None
@@ -1,2 +1,19 @@
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from backend.security.crypto import encrypt_value, decrypt_value, decrypt_values, get_cipher
+
+
 def test_encryption():
-    pass
+    key = AESGCM.generate_key(bit_length=256)
+    ciphertext = encrypt_value(key, "hunter2")
+
+    assert ciphertext and b"hunter2" not in ciphertext
+    assert decrypt_value(key, ciphertext) == "hunter2"
+    assert decrypt_value(AESGCM.generate_key(bit_length=256), ciphertext) == "[DECRYPTION FAILED]"
+
+
+def test_bulk_decrypt_reuses_cipher():
+    key = AESGCM.generate_key(bit_length=256)
+    values = ["a" * n for n in range(1, 6)]
+
+    assert decrypt_values(key, [encrypt_value(key, v) for v in values] + [None, b""]) == values + [None, None]
+    assert get_cipher(key) is get_cipher(key)